@@ -0,0 +1,25 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import psycopg
+
+from langgraph.checkpoint.postgres import PostgresSaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from psycopg.rows import dict_row
+
+from app.settings import settings
+
+
+@contextmanager
+def open_checkpointer() -> Iterator[PostgresSaver]:
+    # The summary graph state holds data frames, which only the pickle fallback can serialize
+    with psycopg.connect(
+        settings.database_conninfo, autocommit=True, prepare_threshold=0, row_factory=dict_row
+    ) as connection:
+        yield PostgresSaver(connection, serde=JsonPlusSerializer(pickle_fallback=True))
+
+
+def setup_checkpointer() -> None:
+    """Creates or migrates the checkpoint tables, which LangGraph manages itself."""
+    with open_checkpointer() as checkpointer:
+        checkpointer.setup()
@@ -0,0 +1,110 @@
+import hashlib
+import uuid
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, col, select
+
+from app.consensus.dimension_extraction import (
+    CATEGORY_DIMENSIONS_SCHEMAS,
+    DIMENSION_EXTRACTION_SYSTEM_PROMPT,
+    DIMENSION_EXTRACTION_VERSION,
+)
+from app.models import Message, MessageDimensions
+from app.settings import settings
+from app.types import Category, Dimensions
+
+
+def hash_message_content(topic: str, message: str) -> str:
+    """
+    Covers all inputs of the extraction, so editing the message, the topic or the prompt, switching the model or
+    bumping `DIMENSION_EXTRACTION_VERSION` invalidates the cache.
+    """
+    digest = hashlib.sha256()
+    parts = (
+        str(DIMENSION_EXTRACTION_VERSION),
+        settings.azure_openai_model,
+        DIMENSION_EXTRACTION_SYSTEM_PROMPT,
+        topic,
+        message,
+    )
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def load_cached_dimensions(
+    session: Session, discussion_id: uuid.UUID, category: Category
+) -> dict[uuid.UUID, tuple[str, Dimensions | None]]:
+    """Returns the content hash and dimensions per message id, with `None` dimensions for quarantined messages."""
+    statement = (
+        select(MessageDimensions)
+        .join(Message)
+        .where(col(Message.discussion_id) == discussion_id, col(MessageDimensions.category) == category)
+    )
+    schema = CATEGORY_DIMENSIONS_SCHEMAS[category]
+
+    return {
+        db_dimensions.message_id: (
+            db_dimensions.content_hash,
+            None if db_dimensions.dimensions is None else schema.model_validate(db_dimensions.dimensions),
+        )
+        for db_dimensions in session.exec(statement)
+    }
+
+
+def upsert_message_dimensions(session: Session, rows: list[dict[str, Any]]) -> None:
+    if not rows:
+        return
+
+    statement = insert(MessageDimensions)
+    statement = statement.on_conflict_do_update(
+        index_elements=[col(MessageDimensions.message_id), col(MessageDimensions.category)],
+        set_={
+            "content_hash": statement.excluded.content_hash,
+            "dimensions": statement.excluded.dimensions,
+            "error": statement.excluded.error,
+            "created_at": statement.excluded.created_at,
+        },
+    )
+    session.exec(statement, params=rows)
+
+
+def store_dimensions(session: Session, category: Category, dimensions: dict[uuid.UUID, tuple[str, Dimensions]]) -> None:
+    now = datetime.now()
+    upsert_message_dimensions(
+        session,
+        [
+            {
+                "message_id": message_id,
+                "category": category,
+                "content_hash": content_hash,
+                "dimensions": dimensions_.model_dump(mode="json"),
+                "error": None,
+                "created_at": now,
+            }
+            for message_id, (content_hash, dimensions_) in dimensions.items()
+        ],
+    )
+
+
+def quarantine_messages(session: Session, category: Category, errors: dict[uuid.UUID, tuple[str, str]]) -> None:
+    """Keeps messages out of reports, and away from the LLM, until their content hash changes."""
+    now = datetime.now()
+    upsert_message_dimensions(
+        session,
+        [
+            {
+                "message_id": message_id,
+                "category": category,
+                "content_hash": content_hash,
+                "dimensions": None,
+                "error": error,
+                "created_at": now,
+            }
+            for message_id, (content_hash, error) in errors.items()
+        ],
+    )
@@ -1,14 +1,25 @@
-from functools import partial
-from typing import cast
+import asyncio
+import json
+import logging
 
+from functools import cache, partial
+from typing import Any, cast
+
+import openai
+
+from langchain_core.caches import BaseCache
 from langchain_core.language_models import BaseChatModel, LanguageModelInput
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_openai.chat_models.base import OpenAIRefusalError
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
-from pydantic import BaseModel
+from pydantic import BaseModel, create_model
 
-from app.models import Discussion
+from app.llm_cache import RefreshingLLMCache
+from app.models import Discussion, Message
+from app.rate_limit import RateLimiter, get_retry_after
+from app.settings import settings
 from app.types import (
     BinaryProposal,
     BrainstormingIdeation,
@@ -116,6 +127,24 @@ If a value cannot be determined, use null (for strings) or the nearest valid def
 Do not add extra fields. Do not include explanations."""
 
 
+logger = logging.getLogger(__name__)
+
+
+DIMENSION_EXTRACTION_BATCH_PROMPT = """BATCH MODE
+The input contains several opinions, given as a JSON list of objects with an "index" and a "text".
+Apply ALL rules above to each opinion independently, as if it were the only one.
+Instead of a single object, return exactly one JSON object {{"items": [...]}} holding one dimensions object per opinion,
+each with an additional "index" field that copies the index of its opinion. Do not merge, split, skip or reorder opinions."""
+
+
+# Part of the cached dimensions' content hash; bump it when the prompts or the dimension schemas change in meaning
+DIMENSION_EXTRACTION_VERSION = 1
+
+CHARACTERS_PER_TOKEN_ESTIMATE = 4
+EXTRACTION_COMPLETION_TOKENS_ESTIMATE = 300
+RETRY_BACKOFF_SECONDS = 2.0
+
+
 CATEGORY_EXTRACTION_PROMPT_TEMPLATE = ChatPromptTemplate.from_messages(
     [
         ("system", DIMENSION_EXTRACTION_SYSTEM_PROMPT),
@@ -123,45 +152,202 @@ CATEGORY_EXTRACTION_PROMPT_TEMPLATE = ChatPromptTemplate.from_messages(
     ]
 )
 
+CATEGORY_BATCH_EXTRACTION_PROMPT_TEMPLATE = ChatPromptTemplate.from_messages(
+    [
+        ("system", DIMENSION_EXTRACTION_SYSTEM_PROMPT + "\n\n" + DIMENSION_EXTRACTION_BATCH_PROMPT),
+        ("user", "Category: {category}\nTopic: {topic}\nOpinions: {opinions}"),
+    ]
+)
+
+
+CATEGORY_DIMENSIONS_SCHEMAS: dict[Category, type[Dimensions]] = {
+    Category.BINARY_PROPOSAL: BinaryProposal,
+    Category.PRIORITIZATION_RANKING: PrioritizationRanking,
+    Category.BRAINSTORMING_IDEATION: BrainstormingIdeation,
+    Category.FEEDBACK_RETROSPECTIVE: FeedbackRetrospective,
+    Category.FORECASTING_PLANNING: ForecastingPlanning,
+}
+
 
 class DimensionExtractionGraphState(BaseModel):
     discussion: Discussion
     category: Category
-    dimensions: list[Dimensions] | None = None
+    # The messages to extract dimensions for, e.g. only those without cached dimensions
+    messages: list[Message]
+    # Per message, either the dimensions or the error that made the extraction give up
+    dimensions: list[Dimensions | None] | None = None
+    errors: list[str | None] | None = None
 
 
 def return_category(state: DimensionExtractionGraphState) -> Category:
     return state.category
 
 
-def extraction_dimensions(
+@cache
+def create_batch_schema(schema: type[Dimensions]) -> type[BaseModel]:
+    """`{"items": [...]}` of the category's dimensions, each with the `index` of its opinion."""
+    indexed_schema = create_model(f"Indexed{schema.__name__}", __base__=schema, index=(int, ...))
+    return create_model(f"{schema.__name__}Batch", items=(list[indexed_schema], ...))  # type: ignore[valid-type]
+
+
+def backoff(attempt: int) -> float:
+    return RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+
+
+def create_extraction_chain(
+    prompt_template: ChatPromptTemplate, llm: BaseChatModel, schema: type[BaseModel]
+) -> Runnable[dict[str, Any], dict[str, Any]]:
+    return prompt_template | cast(
+        Runnable[LanguageModelInput, dict[str, Any]],
+        llm.with_structured_output(schema, include_raw=True),
+    )
+
+
+async def ainvoke_rate_limited(
+    chain: Runnable[dict[str, Any], dict[str, Any]],
+    retry_chain: Runnable[dict[str, Any], dict[str, Any]],
+    prompt_template: ChatPromptTemplate,
+    inputs: dict[str, Any],
+    completion_tokens_estimate: int,
+    rate_limiter: RateLimiter,
+) -> Any:
+    """
+    Rate limited with an estimate of the prompt and completion tokens, which is corrected with the reported usage.
+    429s pause all extractions sharing the rate limiter for the `Retry-After` duration.
+    Each attempt is bounded by `dimension_extraction_timeout`; timeouts, transient API errors and unparseable
+    responses are retried with exponential backoff, the latter on `retry_chain`, which must skip the lookups of the LLM cache.
+    """
+    estimated_tokens = (
+        len(prompt_template.format(**inputs)) // CHARACTERS_PER_TOKEN_ESTIMATE + completion_tokens_estimate
+    )
+
+    attempt = 0
+    while True:
+        attempt += 1
+        await rate_limiter.acquire(estimated_tokens)
+
+        try:
+            # Tags the model call for `LLMInstrumentationHandler`
+            output = await asyncio.wait_for(
+                chain.ainvoke(inputs, config={"metadata": {"attempt": attempt}}),
+                settings.dimension_extraction_timeout,
+            )
+        except openai.RateLimitError as e:
+            if attempt >= settings.dimension_extraction_max_attempts:
+                raise
+            rate_limiter.pause(get_retry_after(e) or backoff(attempt))
+            continue
+        except (openai.APIConnectionError, openai.InternalServerError, TimeoutError):
+            if attempt >= settings.dimension_extraction_max_attempts:
+                raise
+            await asyncio.sleep(backoff(attempt))
+            continue
+
+        if (usage_metadata := output["raw"].usage_metadata) is not None:
+            rate_limiter.record_usage(estimated_tokens, usage_metadata["total_tokens"])
+
+        if output["parsing_error"] is not None:
+            if attempt >= settings.dimension_extraction_max_attempts:
+                raise output["parsing_error"]
+            chain = retry_chain
+            await asyncio.sleep(backoff(attempt))
+            continue
+
+        return output["parsed"]
+
+
+async def extraction_dimensions(
     state: DimensionExtractionGraphState,
     config: RunnableConfig,
     schema: type[Dimensions],
 ) -> dict:
     llm = cast(BaseChatModel, config["configurable"]["llm"])
-    structured_llm = cast(
-        Runnable[
-            LanguageModelInput,
-            Dimensions,
-        ],
-        llm.with_structured_output(schema),
+    # The model's cache holds the unparseable response under the same key, a retry must not read it but replace it
+    retry_llm = llm.model_copy(
+        update={"cache": RefreshingLLMCache(llm.cache) if isinstance(llm.cache, BaseCache) else False}
     )
+    rate_limiter = cast(RateLimiter, config["configurable"]["rate_limiter"])
+
+    chain = create_extraction_chain(CATEGORY_EXTRACTION_PROMPT_TEMPLATE, llm, schema)
+    retry_chain = create_extraction_chain(CATEGORY_EXTRACTION_PROMPT_TEMPLATE, retry_llm, schema)
+    batch_schema = create_batch_schema(schema)
+    batch_chain = create_extraction_chain(CATEGORY_BATCH_EXTRACTION_PROMPT_TEMPLATE, llm, batch_schema)
+    batch_retry_chain = create_extraction_chain(CATEGORY_BATCH_EXTRACTION_PROMPT_TEMPLATE, retry_llm, batch_schema)
+    semaphore = asyncio.Semaphore(settings.dimension_extraction_concurrency)
+
+    async def extract(message: Message) -> tuple[Dimensions | None, str | None]:
+        """Gives up on the message, instead of the whole extraction, if it keeps failing for reasons of its own."""
+        try:
+            async with semaphore:
+                dimensions = await ainvoke_rate_limited(
+                    chain,
+                    retry_chain,
+                    CATEGORY_EXTRACTION_PROMPT_TEMPLATE,
+                    {
+                        "category": state.category,
+                        "topic": state.discussion.name,
+                        "opinion": message.message,
+                    },
+                    EXTRACTION_COMPLETION_TOKENS_ESTIMATE,
+                    rate_limiter,
+                )
+        except (ValueError, TimeoutError, OpenAIRefusalError, openai.BadRequestError) as e:
+            logger.warning("Dimension extraction of message %s failed: %r", message.id, e)
+            return None, repr(e)
+
+        return cast(Dimensions, dimensions), None
+
+    async def extract_batch(messages: list[Message]) -> list[tuple[Dimensions | None, str | None]]:
+        """Messages whose dimensions are missing from the batch response, or ambiguous, are extracted one by one."""
+        if len(messages) == 1:
+            return [await extract(messages[0])]
+
+        items: dict[int, Dimensions] = {}
+        try:
+            async with semaphore:
+                batch = await ainvoke_rate_limited(
+                    batch_chain,
+                    batch_retry_chain,
+                    CATEGORY_BATCH_EXTRACTION_PROMPT_TEMPLATE,
+                    {
+                        "category": state.category,
+                        "topic": state.discussion.name,
+                        "opinions": json.dumps(
+                            [{"index": i, "text": message.message} for i, message in enumerate(messages)],
+                            ensure_ascii=False,
+                        ),
+                    },
+                    EXTRACTION_COMPLETION_TOKENS_ESTIMATE * len(messages),
+                    rate_limiter,
+                )
+        except (openai.OpenAIError, ValueError, TimeoutError, OpenAIRefusalError):
+            logger.warning("Batch extraction of %d messages failed, extracting them one by one", len(messages))
+        else:
+            indexes = [item.index for item in batch.items]
+            if len(batch.items) != len(messages):
+                logger.warning("Batch extraction returned %d items for %d messages", len(batch.items), len(messages))
+
+            items = {
+                item.index: schema.model_validate(item.model_dump(exclude={"index"}))
+                for item in batch.items
+                if 0 <= item.index < len(messages) and indexes.count(item.index) == 1
+            }
 
-    chain = CATEGORY_EXTRACTION_PROMPT_TEMPLATE | structured_llm
+        fallbacks = [message for i, message in enumerate(messages) if i not in items]
+        fallback_results = iter(await asyncio.gather(*(extract(message) for message in fallbacks)))
 
-    dimensions = chain.batch(
-        [
-            {
-                "category": state.category,
-                "topic": state.discussion.name,
-                "opinion": message.message,
-            }
-            for message in state.discussion.messages
-        ]
+        return [(items[i], None) if i in items else next(fallback_results) for i in range(len(messages))]
+
+    batch_size = max(1, settings.dimension_extraction_batch_size)
+    batches = await asyncio.gather(
+        *(extract_batch(state.messages[i : i + batch_size]) for i in range(0, len(state.messages), batch_size))
     )
+    results = [result for batch in batches for result in batch]
 
-    return {"dimensions": dimensions}
+    return {
+        "dimensions": [dimensions for dimensions, _ in results],
+        "errors": [error for _, error in results],
+    }
 
 
 dimension_extraction_graph_builder = StateGraph(DimensionExtractionGraphState)
@@ -0,0 +1,257 @@
+import asyncio
+import logging
+import time
+import uuid
+
+from typing import Any, cast
+
+import pandas as pd
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph.state import CompiledStateGraph
+from pydantic import BaseModel
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session
+
+from app.checkpoints import open_checkpointer
+from app.consensus.category_selection import CategorySelectionGraphState, category_selection_graph
+from app.consensus.dimension_cache import (
+    hash_message_content,
+    load_cached_dimensions,
+    quarantine_messages,
+    store_dimensions,
+)
+from app.consensus.dimension_extraction import DimensionExtractionGraphState, dimension_extraction_graph
+from app.consensus.summary import SummaryGraphState, summary_graph
+from app.consensus.summary_helpers import df_to_native_records
+from app.instrumentation import LLMInstrumentationHandler
+from app.llm import create_extraction_llm, get_llm, rate_limiter
+from app.models import Discussion
+from app.notifications import notify_report_progress
+from app.report_store import store_report, upsert_report_status
+from app.settings import settings
+from app.types import Category, Dimensions, ExtractionFailurePolicy
+
+
+logger = logging.getLogger(__name__)
+
+
+CHECKPOINTED_GRAPHS = ("category_selection", "summary")
+
+
+def get_thread_id(graph: str, discussion_id: uuid.UUID) -> str:
+    return f"{discussion_id}:{graph}"
+
+
+def create_graph_config(
+    graph: str, discussion_id: uuid.UUID, handler: LLMInstrumentationHandler, **configurable: Any
+) -> RunnableConfig:
+    return RunnableConfig(
+        configurable={"thread_id": get_thread_id(graph, discussion_id), **configurable},
+        callbacks=[handler],
+        metadata={"graph": graph, "discussion_id": str(discussion_id)},
+    )
+
+
+def invoke_resumable(
+    graph: CompiledStateGraph,
+    state: BaseModel,
+    config: RunnableConfig,
+    checkpointer: BaseCheckpointSaver,
+    resume: bool,
+) -> dict[str, Any]:
+    """
+    Runs the graph with checkpoints after every node.
+    With `resume`, an interrupted run continues after its last completed node and a finished run is not repeated.
+    """
+    graph = graph.copy(update={"checkpointer": checkpointer})
+
+    if resume:
+        snapshot = graph.get_state(config)
+        if snapshot.next:
+            logger.info("Resuming %s before %s", config["configurable"]["thread_id"], ", ".join(snapshot.next))
+            return graph.invoke(None, config)
+        if snapshot.created_at is not None:
+            return cast(dict[str, Any], snapshot.values)
+
+    return graph.invoke(state, config)
+
+
+class DimensionExtractionError(Exception):
+    pass
+
+
+async def run_dimension_extraction(
+    state: DimensionExtractionGraphState, handler: LLMInstrumentationHandler
+) -> dict[str, Any]:
+    """Runs in the event loop of the job, with an extraction model of its own."""
+    async with create_extraction_llm() as extraction_llm:
+        return await dimension_extraction_graph.ainvoke(
+            state,
+            config=create_graph_config(
+                "dimension_extraction", state.discussion.id, handler, llm=extraction_llm, rate_limiter=rate_limiter
+            ),
+        )
+
+
+def extract_dimensions(
+    session: Session, db_discussion: Discussion, category: Category, handler: LLMInstrumentationHandler
+) -> tuple[list[uuid.UUID], list[Dimensions]]:
+    """
+    Only sends messages without cached dimensions for the category, or whose content changed since, to the LLM.
+    The fresh dimensions are stored with the next commit.
+    Messages whose extraction failed are handled according to `dimension_extraction_failure_policy`.
+    Returns the ids of the messages with dimensions, i.e. without dropped and quarantined ones, and their dimensions.
+    """
+    cached_dimensions = load_cached_dimensions(session, db_discussion.id, category)
+    content_hashes = {
+        message.id: hash_message_content(db_discussion.name, message.message) for message in db_discussion.messages
+    }
+    stale_messages = [
+        message
+        for message in db_discussion.messages
+        if message.id not in cached_dimensions or cached_dimensions[message.id][0] != content_hashes[message.id]
+    ]
+
+    if stale_messages:
+        dimension_extraction_graph_state = asyncio.run(
+            run_dimension_extraction(
+                DimensionExtractionGraphState(discussion=db_discussion, category=category, messages=stale_messages),
+                handler,
+            )
+        )
+
+        extracted_dimensions: dict[uuid.UUID, tuple[str, Dimensions]] = {}
+        errors: dict[uuid.UUID, tuple[str, str]] = {}
+        for message, dimensions, error in zip(
+            stale_messages,
+            dimension_extraction_graph_state["dimensions"],
+            dimension_extraction_graph_state["errors"],
+            strict=True,
+        ):
+            if dimensions is not None:
+                extracted_dimensions[message.id] = (content_hashes[message.id], dimensions)
+            else:
+                errors[message.id] = (content_hashes[message.id], error)
+
+        store_dimensions(session, category, extracted_dimensions)
+        cached_dimensions |= extracted_dimensions
+
+        if errors:
+            logger.warning(
+                "Dimension extraction failed for %d of %d messages of discussion %s, policy %s",
+                len(errors),
+                len(stale_messages),
+                db_discussion.id,
+                settings.dimension_extraction_failure_policy.value,
+            )
+
+        if errors and settings.dimension_extraction_failure_policy == ExtractionFailurePolicy.FAIL:
+            # Keeps the successful extractions for the retry of the job
+            session.commit()
+            raise DimensionExtractionError(f"Dimension extraction failed for {len(errors)} messages")
+
+        if settings.dimension_extraction_failure_policy == ExtractionFailurePolicy.QUARANTINE:
+            quarantine_messages(session, category, errors)
+
+    message_ids: list[uuid.UUID] = []
+    dimensions_: list[Dimensions] = []
+    for message in db_discussion.messages:
+        if message.id in cached_dimensions and (dimensions := cached_dimensions[message.id][1]) is not None:
+            message_ids.append(message.id)
+            dimensions_.append(dimensions)
+
+    return message_ids, dimensions_
+
+
+def generate_consensus_report(discussion_id: uuid.UUID, engine: Engine | Connection, resume: bool = False) -> None:
+    """
+    With `resume`, picks up the checkpoints of an interrupted previous attempt; otherwise they are discarded.
+    Dimension extraction is not checkpointed, the stored message dimensions and the LLM cache make it resumable.
+    """
+    handler = LLMInstrumentationHandler()
+    timings: dict[str, float] = {}
+
+    with Session(engine) as session, open_checkpointer() as checkpointer:
+        if not resume:
+            for graph in CHECKPOINTED_GRAPHS:
+                checkpointer.delete_thread(get_thread_id(graph, discussion_id))
+
+        db_discussion = cast(Discussion, session.get(Discussion, discussion_id))
+
+        started_at = time.perf_counter()
+        category_selection_graph_state = invoke_resumable(
+            category_selection_graph,
+            CategorySelectionGraphState(discussion=db_discussion),
+            create_graph_config("category_selection", discussion_id, handler, llm=get_llm()),
+            checkpointer,
+            resume,
+        )
+        timings["category_selection"] = time.perf_counter() - started_at
+
+        category: Category = Category(category_selection_graph_state["category"])
+
+        session.exec(upsert_report_status(discussion_id, report_progress=0.1))
+        notify_report_progress(session, discussion_id, 0.1)
+        session.commit()
+
+        started_at = time.perf_counter()
+        message_ids, dimensions = extract_dimensions(session, db_discussion, category, handler)
+        timings["dimension_extraction"] = time.perf_counter() - started_at
+
+        session.exec(upsert_report_status(discussion_id, report_progress=0.5))
+        notify_report_progress(session, discussion_id, 0.5)
+        session.commit()
+
+        started_at = time.perf_counter()
+        summary_graph_state = invoke_resumable(
+            summary_graph,
+            SummaryGraphState(
+                discussion=db_discussion,
+                category=category,
+                message_ids=message_ids,
+                dimensions=dimensions,
+            ),
+            create_graph_config("summary", discussion_id, handler, llm=get_llm()),
+            checkpointer,
+            resume,
+        )
+        timings["summary"] = time.perf_counter() - started_at
+
+        theme_board = cast(pd.DataFrame, summary_graph_state["theme_board"])
+        sentiment_table = cast(pd.DataFrame, summary_graph_state["sentiment_table"])
+        emotion_table = cast(pd.DataFrame, summary_graph_state["emotion_table"])
+        payload = cast(dict, summary_graph_state["payload"])
+        summary = cast(str, summary_graph_state["summary"])
+
+        llm_calls = handler.breakdown()
+        logger.info(
+            "Consensus report for discussion %s: %d LLM calls, %d prompt and %d completion tokens, timings %s",
+            discussion_id,
+            sum(breakdown.calls for breakdown in llm_calls),
+            sum(breakdown.prompt_tokens for breakdown in llm_calls),
+            sum(breakdown.completion_tokens for breakdown in llm_calls),
+            {stage: round(seconds, 2) for stage, seconds in timings.items()},
+        )
+        handler.log_breakdown(discussion_id)
+
+        report = {
+            "theme_board": df_to_native_records(theme_board),
+            "sentiment_table": df_to_native_records(sentiment_table),
+            "emotion_table": df_to_native_records(emotion_table),
+            "payload": payload,
+            "summary": summary,
+            "excluded_messages": len(db_discussion.messages) - len(message_ids),
+            # Cost and timing breakdown of this run, cached messages and LLM responses cost nothing
+            "llm_calls": [breakdown.model_dump() for breakdown in llm_calls],
+            "timings": timings,
+        }
+
+        # A new version, previous reports are kept
+        store_report(session, discussion_id, report)
+        notify_report_progress(session, discussion_id, 1)
+        session.commit()
+
+        for graph in CHECKPOINTED_GRAPHS:
+            checkpointer.delete_thread(get_thread_id(graph, discussion_id))
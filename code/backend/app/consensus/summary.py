@@ -1,5 +1,7 @@
 import json
+import uuid
 
+from collections import defaultdict
 from typing import cast
 
 import numpy as np
@@ -12,27 +14,24 @@ from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 from pydantic import BaseModel
 
+from app.consensus.dimension_extraction import CATEGORY_DIMENSIONS_SCHEMAS
 from app.consensus.summary_helpers import (
     CATEGORY_FIELD_OPTIONS,
-    bimodal_flag,
     bullet_agree_text,
     bullet_disagree_text,
     bullet_next_text,
-    cluster_similarity,
-    compute_weight_row,
-    consensus_for_group,
-    consensus_score_for_group,
+    cluster_themes,
+    cluster_themes_tfidf,
+    compute_theme_signals,
+    compute_weights,
     df_to_native_records,
-    dominant_share,
-    emotion_distribution,
-    mismatch_weight_share,
+    dimensions_frame,
     pick_cluster_label,
     representative_quotes,
-    sentiment_score,
-    top_evidence_items,
-    weighted_average,
+    top_evidence_table,
 )
 from app.models import Discussion
+from app.settings import settings
 from app.types import (
     Actionability,
     Category,
@@ -43,6 +42,7 @@ from app.types import (
     PriorityClass,
     Sentiment,
     Summary,
+    ThemeSimilarity,
 )
 
 
@@ -99,13 +99,24 @@ SUMMARY_PROMPT_TEMPLATE = ChatPromptTemplate.from_messages(
 )
 
 
+# Cosine similarities of TF-IDF vectors run lower than the forgiving maximum of the string similarities
+THEME_SIMILARITY_THRESHOLDS = {
+    ThemeSimilarity.STRING: 0.35,
+    ThemeSimilarity.TFIDF: 0.3,
+}
+
+
 class SummaryGraphState(BaseModel):
     discussion: Discussion
     category: Category
+    # Ids of the messages the dimensions belong to, all messages of the discussion if not set
+    message_ids: list[uuid.UUID] | None = None
     dimensions: list[Dimensions]
     df: pd.DataFrame | None = None
     cluster_summary: pd.DataFrame | None = None
+    theme_signals_df: pd.DataFrame | None = None
     panels_df: pd.DataFrame | None = None
+    top_evidence_df: pd.DataFrame | None = None
     dissent_df: pd.DataFrame | None = None
     what_we_agree_on: list[str] | None = None
     where_we_disagree: list[str] | None = None
@@ -121,14 +132,20 @@ class SummaryGraphState(BaseModel):
         arbitrary_types_allowed = True
 
 
+def enable_copy_on_write() -> None:
+    """
+    Turns on pandas copy-on-write for the whole process, the default from pandas 3.
+    The nodes never modify the frames of the state in place, they derive new frames with `assign` or filters;
+    with copy-on-write, those share the unchanged columns instead of copying the whole frame.
+    """
+    pd.set_option("mode.copy_on_write", True)
+
+
 def prepare_dataframe(state: SummaryGraphState) -> pd.DataFrame:
-    df = pd.DataFrame(
-        {"id": message_id, **dimensions}
-        for message_id, dimensions in zip(
-            (message.id for message in state.discussion.messages),
-            (dimensions_.model_dump() for dimensions_ in state.dimensions),
-            strict=True,
-        )
+    df = dimensions_frame(
+        state.message_ids if state.message_ids is not None else (message.id for message in state.discussion.messages),
+        state.dimensions,
+        CATEGORY_DIMENSIONS_SCHEMAS[state.category],
     )
 
     return {"df": df}
@@ -141,7 +158,7 @@ def step_a_filter(state: SummaryGraphState, min_relevancy: float = 0.6) -> dict:
     - Keep rows with relevancy >= min_relevancy
     Expects columns: ['risk_flag', 'relevancy']
     """
-    df = cast(pd.DataFrame, state.df).copy()
+    df = cast(pd.DataFrame, state.df)
 
     required = {"risk_flag", "relevancy"}
     missing = required - set(df.columns)
@@ -158,25 +175,26 @@ def step_b_add_weights(state: SummaryGraphState) -> pd.DataFrame:
     Adds a weight column to the dataframe.
     Requires: ['relevancy', 'confidence', 'evidence_type', 'is_critical_opinion']
     """
-    df = cast(pd.DataFrame, state.df).copy()
+    df = cast(pd.DataFrame, state.df)
 
     required = {"relevancy", "confidence", "evidence_type", "is_critical_opinion"}
     missing = required - set(df.columns)
     if missing:
         raise ValueError(f"Missing required columns for Step B: {missing}")
 
-    df["weight_score_algo"] = df.apply(compute_weight_row, axis=1)
-    return {"df": df}
+    return {"df": df.assign(weight_score_algo=compute_weights(df))}
 
 
 def step_c_cluster_themes_simple(
     state: SummaryGraphState,
-    sim_threshold: float = 0.35,
+    config: RunnableConfig,
+    sim_threshold: float | None = None,
     top_k: int | None = None,
 ) -> dict:
     """
     Cluster semantically similar themes using simple string stats (no embeddings).
-    - sim_threshold: themes with similarity >= threshold are merged
+    - similarity: `configurable["theme_similarity"]`, `settings.theme_similarity` by default
+    - sim_threshold: themes with similarity >= threshold are merged, by default the similarity's threshold
     - top_k: optionally keep only top_k clusters by total weight
 
     Returns:
@@ -186,7 +204,7 @@ def step_c_cluster_themes_simple(
       cluster_summary: one row per cluster with:
         - 'theme_cluster_id', 'theme_cluster_label', 'weight_sum', 'count'
     """
-    df = cast(pd.DataFrame, state.df).copy()
+    df = cast(pd.DataFrame, state.df)
 
     if "theme" not in df.columns:
         raise ValueError("Missing required column 'theme'.")
@@ -196,30 +214,18 @@ def step_c_cluster_themes_simple(
     theme_weights = theme_weights.sort_values("weight_score_algo", ascending=False).reset_index(drop=True)
     unique_themes = theme_weights["theme"].tolist()
 
-    clusters: list[dict] = []  # list of dicts: {'id':int, 'members':[str], 'label':str}
-    theme_to_cluster = {}
-
-    next_id = 0
-    for theme in unique_themes:
-        # Try to attach to the best existing cluster
-        best_sim, best_idx = 0.0, None
-        for i, c in enumerate(clusters):
-            # Compare to cluster's representative label
-            sim = cluster_similarity(theme, c["label"])
-            if sim > best_sim:
-                best_sim, best_idx = sim, i
-
-        if best_idx is not None and best_sim >= sim_threshold:
-            clusters[best_idx]["members"].append(theme)
-            theme_to_cluster[theme] = clusters[best_idx]["id"]
-        else:
-            clusters.append({"id": next_id, "members": [theme], "label": theme})
-            theme_to_cluster[theme] = next_id
-            next_id += 1
+    similarity = ThemeSimilarity(config["configurable"].get("theme_similarity", settings.theme_similarity))
+    if sim_threshold is None:
+        sim_threshold = THEME_SIMILARITY_THRESHOLDS[similarity]
+
+    if similarity == ThemeSimilarity.TFIDF:
+        theme_to_cluster = cluster_themes_tfidf(unique_themes, sim_threshold)
+    else:
+        theme_to_cluster = cluster_themes(unique_themes, sim_threshold)
 
     # Derive final label per cluster using weighted choice
     # Build mapping theme -> cluster_id for all rows
-    df["theme_cluster_id"] = df["theme"].map(lambda t: theme_to_cluster.get(t, -1))
+    df = df.assign(theme_cluster_id=df["theme"].map(lambda t: theme_to_cluster.get(t, -1)))
 
     # Compute labels with weighted winner inside each cluster
     cluster_labels = {}
@@ -227,7 +233,7 @@ def step_c_cluster_themes_simple(
         label = pick_cluster_label(group["theme"], group["weight_score_algo"])
         cluster_labels[cid] = label
 
-    df["theme_cluster_label"] = df["theme_cluster_id"].map(cluster_labels)
+    df = df.assign(theme_cluster_label=df["theme_cluster_id"].map(cluster_labels))
 
     # Cluster summary
     cluster_summary = (
@@ -249,6 +255,34 @@ def step_c_cluster_themes_simple(
     }
 
 
+def get_theme_col(df: pd.DataFrame) -> str:
+    if "theme_cluster_label" in df.columns:
+        return "theme_cluster_label"
+    # fallback to 'theme'
+    if "theme" in df.columns:
+        return "theme"
+    raise ValueError("Missing theme column 'theme_cluster_label', and no 'theme' column present.")
+
+
+def aggregate_theme_signals(state: SummaryGraphState) -> dict:
+    """
+    Computes the per-theme signals of the signal panels and the dissent detection in one grouped pass,
+    see `compute_theme_signals`.
+    """
+    category = state.category
+    df = cast(pd.DataFrame, state.df)
+
+    option_col, allowed_options = CATEGORY_FIELD_OPTIONS[category]
+    theme_col = get_theme_col(df)
+
+    needed = {"sentiment", "emotion", "confidence", "is_against", "weight_score_algo", option_col}
+    missing = needed - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing required columns for theme signals: {missing}")
+
+    return {"theme_signals_df": compute_theme_signals(df, theme_col, option_col, allowed_options)}
+
+
 def build_signal_panels(
     state: SummaryGraphState,
     top_evidence_n: int = 5,
@@ -259,13 +293,10 @@ def build_signal_panels(
 
     Expected columns in df:
       - theme or theme_cluster_label (use theme_col param)
-      - sentiment (values: positive|neutral|negative)
-      - emotion (one of allowed)
       - evidence_type (Data|Benchmark|Citation|ExpertOpinion|Anecdote|Assumption)
-      - confidence (float in [0,1])
       - text (string; already cleaned)
       - weight_col (from Step B)
-      - category-specific field (e.g., Agree, PriorityClass, ...)
+    and the theme signals of `aggregate_theme_signals`.
 
     Returns a DataFrame with one row per theme containing:
       - theme_label
@@ -279,89 +310,66 @@ def build_signal_panels(
       - quotes (list of strings)
       - total_weight (sum of w in theme)
       - count (rows in theme)
+    and the top evidence of all themes as one table, see `top_evidence_table`.
     """
 
-    category = state.category
-    df = cast(pd.DataFrame, state.df).copy()
-
-    option_col, allowed_options = CATEGORY_FIELD_OPTIONS[category]
-    needed_cols = {
-        sentiment_col := "sentiment",
-        "emotion",
-        "evidence_type",
-        "confidence",
-        "text",
-        "weight_score_algo",
-        option_col,
-    }
-    theme_col = "theme_cluster_label"
-    if theme_col not in df.columns:
-        # fallback to 'theme'
-        if "theme" in df.columns:
-            theme_col = "theme"
-        else:
-            raise ValueError(f"Missing theme column '{theme_col}', and no 'theme' column present.")
+    df = cast(pd.DataFrame, state.df)
+    theme_signals_df = cast(pd.DataFrame, state.theme_signals_df)
 
+    theme_col = get_theme_col(df)
+    needed_cols = {"evidence_type", "text", "weight_score_algo"}
     missing = needed_cols - set(df.columns)
     if missing:
         raise ValueError(f"Missing required columns for Step D: {missing}")
 
-    # Make a working copy
-    x = df.copy()
-
-    # sentiment mapping → numeric for polarity
-    x["_sent_score"] = x[sentiment_col].map(sentiment_score).astype(float)
-
-    # Group by theme
-    panels = []
-    for theme_label, g in x.groupby(theme_col):
-        # Consensus calc
-        consensus_info = consensus_score_for_group(g, option_col, allowed_options)
+    # Top evidence and representative quotes of all themes at once
+    top_evidence_df = top_evidence_table(df, theme_col, top_evidence_n)
+    quotes = representative_quotes(df, theme_col, quotes_n)
 
-        # Polarity (weighted avg of sentiment scores)
-        pol = weighted_average(g["_sent_score"], g["weight_score_algo"])
-        pol = float(pol) if pol is not None else 0.0
-
-        # Confidence band (weighted average)
-        avg_conf = weighted_average(g["confidence"], g["weight_score_algo"])
-
-        # Emotion distribution (weighted)
-        emo_dist = emotion_distribution(g)
-
-        # Top evidence
-        evidence = top_evidence_items(g, top_evidence_n)
-
-        # Representative quotes
-        quotes = representative_quotes(g, quotes_n)
-
-        # Bookkeeping
-        total_w = float(g["weight_score_algo"].sum())
-        cnt = int(len(g))
-
-        panels.append(
-            {
-                "theme_label": theme_label,
-                "consensus": consensus_info["consensus"],
-                "dominant_option": consensus_info["dominant_option"],
-                "option_shares": consensus_info["option_shares"],
-                "polarity": pol,  # [-1..1]
-                "avg_confidence": (float(avg_conf) if avg_conf is not None else None),
-                "emotion_dist": emo_dist,  # dict emotion->share
-                "top_evidence": evidence,  # list of dicts
-                "quotes": quotes,  # list of strings
-                "total_weight": total_w,
-                "count": cnt,
-            }
+    evidence: defaultdict[str, list[dict[str, object]]] = defaultdict(list)
+    for item in top_evidence_df.itertuples(index=False):
+        evidence[item.theme_label].append(
+            {"evidence_type": item.evidence_type, "score": float(item.score), "w": float(item.w), "text": item.text}
         )
 
-    # Sort: by total_weight desc, then consensus desc
+    panels = [
+        {
+            "theme_label": signals.theme_label,
+            "consensus": int(signals.consensus),
+            "dominant_option": signals.dominant_option,
+            "option_shares": signals.option_shares,
+            "polarity": float(signals.polarity),  # [-1..1]
+            "avg_confidence": signals.avg_confidence,
+            "emotion_dist": signals.emotion_dist,  # dict emotion->share
+            "top_evidence": evidence[signals.theme_label],  # list of dicts
+            "quotes": quotes[signals.theme_label],  # list of strings
+            "total_weight": float(signals.total_weight),
+            "count": int(signals.count),
+        }
+        for signals in theme_signals_df.itertuples(index=False)
+    ]
+
+    columns = [
+        "theme_label",
+        "consensus",
+        "dominant_option",
+        "option_shares",
+        "polarity",
+        "avg_confidence",
+        "emotion_dist",
+        "top_evidence",
+        "quotes",
+        "total_weight",
+        "count",
+    ]
+    # Sort: by total_weight desc, then consensus desc; the columns are listed for the case of no themes
     panels_df = (
-        pd.DataFrame(panels)
+        pd.DataFrame(panels, columns=columns)
         .sort_values(by=["total_weight", "consensus"], ascending=[False, False])
         .reset_index(drop=True)
     )
 
-    return {"panels_df": panels_df}
+    return {"panels_df": panels_df, "top_evidence_df": top_evidence_df}
 
 
 def detect_dissent(
@@ -370,43 +378,20 @@ def detect_dissent(
     mismatch_threshold: float = 0.10,
 ) -> pd.DataFrame:
     """
-    Returns one row per theme with dissent signals and reasons.
-
-    Requires columns:
-      - theme_col (or 'theme' fallback)
-      - sentiment, is_against
-      - weight_col
-      - category-specific option column (e.g., Agree / PriorityClass / ...)
+    Returns one row per theme with dissent signals and reasons,
+    from the consensus, mismatch share and bimodality of `aggregate_theme_signals`.
     """
-    category = state.category
-    df = cast(pd.DataFrame, state.df).copy()
-
-    option_col, allowed_options = CATEGORY_FIELD_OPTIONS[category]
-
-    theme_col: str = "theme_cluster_label"
-    if theme_col not in df.columns:
-        if "theme" in df.columns:
-            theme_col = "theme"
-        else:
-            raise ValueError(f"Missing theme column '{theme_col}', and no 'theme' fallback present.")
-
-    needed = {theme_col, "sentiment", "is_against", "weight_score_algo", option_col}
-    missing = needed - set(df.columns)
-    if missing:
-        raise ValueError(f"Missing required columns for dissent detection: {missing}")
+    theme_signals_df = cast(pd.DataFrame, state.theme_signals_df)
 
     rows = []
-    for theme, g in df.groupby(theme_col):
-        # Consensus
-        consensus, dominant_option, shares = consensus_for_group(g, option_col, allowed_options)
-        low_consensus = consensus < int(consensus_threshold)
+    for signals in theme_signals_df.itertuples(index=False):
+        consensus = int(signals.consensus)
+        shares = signals.option_shares
+        mm_share = float(signals.mismatch_share)
 
-        # Mismatch share
-        mm_share = mismatch_weight_share(g)
+        low_consensus = consensus < int(consensus_threshold)
         mismatch_flag = mm_share >= float(mismatch_threshold)
-
-        # Bimodal
-        bi_flag = bimodal_flag(shares)
+        bi_flag = bool(signals.bimodal)
 
         # Final dissent
         dissent = bool(low_consensus or mismatch_flag or bi_flag)
@@ -424,9 +409,9 @@ def detect_dissent(
 
         rows.append(
             {
-                "theme_label": theme,
+                "theme_label": signals.theme_label,
                 "consensus": consensus,
-                "dominant_option": dominant_option,
+                "dominant_option": signals.dominant_option,
                 "option_shares": shares,
                 "mismatch_share": round(mm_share, 4),
                 "low_consensus_flag": low_consensus,
@@ -437,7 +422,24 @@ def detect_dissent(
             }
         )
 
-    df = pd.DataFrame(rows).sort_values(["dissent", "consensus"], ascending=[False, True]).reset_index(drop=True)
+    columns = [
+        "theme_label",
+        "consensus",
+        "dominant_option",
+        "option_shares",
+        "mismatch_share",
+        "low_consensus_flag",
+        "mismatch_flag",
+        "bimodal_flag",
+        "dissent",
+        "dissent_reasons",
+    ]
+    # Listed for the case of no themes
+    df = (
+        pd.DataFrame(rows, columns=columns)
+        .sort_values(["dissent", "consensus"], ascending=[False, True])
+        .reset_index(drop=True)
+    )
 
     return {"dissent_df": df}
 
@@ -460,8 +462,8 @@ def build_executive_consensus_card(
       - Disagree: themes flagged by dissent detector, sorted by (dissent=True first, consensus asc).
       - Next: lower-consensus (55-min_consensus_agree) or low-confidence themes, sorted by (confidence asc).
     """
-    panels_df = cast(pd.DataFrame, state.panels_df).copy()
-    dissent_df = cast(pd.DataFrame, state.dissent_df).copy()
+    panels_df = cast(pd.DataFrame, state.panels_df)
+    dissent_df = cast(pd.DataFrame, state.dissent_df)
 
     category = state.category
 
@@ -482,8 +484,10 @@ def build_executive_consensus_card(
 
     # Join panels + dissent on theme_label
     dd = dissent_df.set_index("theme_label") if "theme_label" in dissent_df.columns else None
-    panels = panels_df.copy()
-    panels["_dom_share"] = panels.apply(dominant_share, axis=1)
+    theme_signals_df = cast(pd.DataFrame, state.theme_signals_df)
+    panels = panels_df.assign(
+        _dom_share=panels_df["theme_label"].map(theme_signals_df.set_index("theme_label")["dominant_share"])
+    )
 
     # Agree candidates
     agree_candidates = panels[
@@ -496,9 +500,7 @@ def build_executive_consensus_card(
     where_we_disagree: list[str] = []
 
     if dd is not None:
-        tmp = panels.copy()
-        tmp["dissent"] = tmp["theme_label"].map(dd["dissent"])
-        tmp["dissent"] = tmp["dissent"].fillna(False)
+        tmp = panels.assign(dissent=panels["theme_label"].map(dd["dissent"]).fillna(False).astype(bool))
         # sort dissent themes first, then low consensus
         disagree_candidates = tmp[tmp["dissent"]].sort_values(["consensus", "total_weight"], ascending=[True, False])
 
@@ -526,11 +528,12 @@ def build_theme_leaderboard(state: SummaryGraphState, top_k: int | None = 10) ->
     Returns a compact leaderboard of themes sorted by (total_weight desc, consensus desc).
     Columns: theme_label, consensus, dominant_option, dom_share, avg_confidence, total_weight, count
     """
-    panels_df = cast(pd.DataFrame, state.panels_df).copy()
+    panels_df = cast(pd.DataFrame, state.panels_df)
+    theme_signals_df = cast(pd.DataFrame, state.theme_signals_df)
 
-    panels_df["dom_share"] = panels_df.apply(dominant_share, axis=1)
+    dom_shares = theme_signals_df.set_index("theme_label")["dominant_share"]
     theme_board = (
-        panels_df[
+        panels_df.assign(dom_share=panels_df["theme_label"].map(dom_shares))[
             ["theme_label", "consensus", "dominant_option", "dom_share", "avg_confidence", "total_weight", "count"]
         ]
         .sort_values(["total_weight", "consensus"], ascending=[False, False])
@@ -547,32 +550,22 @@ def build_evidence_board(
     top_n: int = 15,
 ) -> dict:
     """
-    Flattens top_evidence entries across themes and ranks by 'score' (ev_factor * w).
+    Ranks the top evidence of all themes by 'score' (ev_factor * w), then 'w';
+    ties keep the order of the panels and the rank within the theme.
     Returns columns: theme_label, evidence_type, score, w, text
     """
-    panels_df = cast(pd.DataFrame, state.panels_df).copy()
+    panels_df = cast(pd.DataFrame, state.panels_df)
+    top_evidence_df = cast(pd.DataFrame, state.top_evidence_df)
 
-    rows = []
-    for _, r in panels_df.iterrows():
-        evs = r.get("top_evidence", []) or []
-        for ev in evs:
-            rows.append(
-                {
-                    "theme_label": r["theme_label"],
-                    "evidence_type": ev.get("evidence_type"),
-                    "score": float(ev.get("score", 0.0)),
-                    "w": float(ev.get("w", 0.0)),
-                    "text": ev.get("text", ""),
-                }
-            )
-
-    if not rows:
-        return pd.DataFrame(columns=["theme_label", "evidence_type", "score", "w", "text"])
-
-    ebd = pd.DataFrame(rows).sort_values(["score", "w"], ascending=[False, False]).reset_index(drop=True)
+    panel_positions = pd.Series(np.arange(len(panels_df)), index=panels_df["theme_label"])
+    ebd = (
+        top_evidence_df.assign(panel_position=top_evidence_df["theme_label"].map(panel_positions))
+        .sort_values(["score", "w", "panel_position", "rank"], ascending=[False, False, True, True])
+        .reset_index(drop=True)
+    )
 
     return {
-        "evidence_board": ebd.head(max(0, int(top_n))),
+        "evidence_board": ebd[["theme_label", "evidence_type", "score", "w", "text"]].head(max(0, int(top_n))),
     }
 
 
@@ -581,80 +574,34 @@ def build_sentiment_emotion_heatmap(
     normalize: bool = True,
 ) -> dict:
     """
-    Creates:
-      - sentiment_table: theme x sentiment in weighted share (if available) or proxies using polarity
-      - emotion_table:   theme x emotion share based on 'emotion_dist'
-    Notes:
-      - Our earlier steps stored only an aggregate polarity ([-1,1]) and emotion_dist per theme.
-      - We produce a simple sentiment proxy table using polarity bands (neg/neu/pos).
+    Creates, with one row per theme sorted by theme_label:
+      - sentiment_table: theme x sentiment (negative/neutral/positive columns) in weighted share
+      - emotion_table:   theme x emotion ("Emotion.X" columns, for the emotions present) in weighted share
+    Both are weight pivots of the rows; with `normalize=False` they hold the weight sums instead of shares.
     """
-
-    panels_df = cast(pd.DataFrame, state.panels_df).copy()
-
-    # Sentiment proxy from polarity
-    def band(p: float) -> Sentiment:
-        if p <= -0.25:
-            return Sentiment.NEGATIVE
-        if p >= 0.25:
-            return Sentiment.POSITIVE
-        return Sentiment.NEUTRAL
-
-    sent_rows = []
-    emo_rows = []
-    for _, r in panels_df.iterrows():
-        theme = r["theme_label"]
-        pol = float(r.get("polarity", 0.0))
-        b = band(pol)
-        # sentiment "one-hot" proxy
-        sent_rows.append({"theme_label": theme, b: 1.0})
-
-        # emotion distribution already normalized by weight in earlier step
-        emo_dist = r.get("emotion_dist", {}) or {}
-        if emo_dist:
-            d = {"theme_label": theme}
-            d.update(emo_dist)
-            emo_rows.append(d)
-        else:
-            emo_rows.append({"theme_label": theme})
-
-    # Build sentiment proxy table
-    sent_df = pd.DataFrame(sent_rows).fillna(0.0)
-    if not sent_df.empty:
-        sentiment_table = sent_df.groupby("theme_label", as_index=False).sum()
-        # normalize across sentiments per theme to sum to 1
-        sentiment_cols = [c for c in [sentiment.value for sentiment in Sentiment] if c in sentiment_table.columns]
-        if normalize and sentiment_cols:
-            sentiment_table[sentiment_cols] = (
-                sentiment_table[sentiment_cols]
-                .div(sentiment_table[sentiment_cols].sum(axis=1).replace(0, np.nan), axis=0)
-                .fillna(0.0)
-            )
-    else:
-        sentiment_table = pd.DataFrame(
-            columns=[
-                "theme_label",
-                Sentiment.NEGATIVE.value,
-                Sentiment.NEUTRAL.value,
-                Sentiment.POSITIVE.value,
-            ]
+    df = cast(pd.DataFrame, state.df)
+    theme_col = get_theme_col(df)
+
+    def weight_table(column: str, observed: bool) -> pd.DataFrame:
+        table = df.pivot_table(
+            index=theme_col,
+            columns=column,
+            values="weight_score_algo",
+            aggfunc="sum",
+            fill_value=0.0,
+            observed=observed,
         )
-
-    sentiment_table = sentiment_table.rename(columns=str.lower)
-
-    # Build emotion table
-    emo_df = pd.DataFrame(emo_rows).fillna(0.0)
-    if not emo_df.empty:
-        # Ensure a fixed set of emotions (columns may vary)
-        all_emotions = sorted(set(emo_df.columns) - {"theme_label"})
-        emotion_table = emo_df.groupby("theme_label", as_index=False)[all_emotions].mean()
-        if normalize and all_emotions:
-            emotion_table[all_emotions] = (
-                emotion_table[all_emotions]
-                .div(emotion_table[all_emotions].sum(axis=1).replace(0, np.nan), axis=0)
-                .fillna(0.0)
-            )
-    else:
-        emotion_table = pd.DataFrame(columns=["theme_label"])
+        table.columns = [str(value) for value in table.columns]
+        if normalize:
+            table = table.div(table.sum(axis=1).replace(0, np.nan), axis=0).fillna(0.0)
+        return table.rename_axis(index="theme_label", columns=None).reset_index()
+
+    # All sentiments, as the frontend shows each of them
+    sentiment_table = weight_table("sentiment", observed=False).rename(
+        columns={str(sentiment): sentiment.value.lower() for sentiment in Sentiment}
+    )
+    emotion_table = weight_table("emotion", observed=True)
+    emotion_table = emotion_table[["theme_label", *sorted(emotion_table.columns.drop("theme_label"))]]
 
     return {
         "sentiment_table": sentiment_table,
@@ -731,6 +678,7 @@ summary_graph_builder.add_node(prepare_dataframe)
 summary_graph_builder.add_node(step_a_filter)
 summary_graph_builder.add_node(step_b_add_weights)
 summary_graph_builder.add_node(step_c_cluster_themes_simple)
+summary_graph_builder.add_node(aggregate_theme_signals)
 summary_graph_builder.add_node(build_signal_panels)
 summary_graph_builder.add_node(detect_dissent)
 summary_graph_builder.add_node(build_executive_consensus_card)
@@ -744,12 +692,13 @@ summary_graph_builder.add_edge(START, "prepare_dataframe")
 summary_graph_builder.add_edge("prepare_dataframe", "step_a_filter")
 summary_graph_builder.add_edge("step_a_filter", "step_b_add_weights")
 summary_graph_builder.add_edge("step_b_add_weights", "step_c_cluster_themes_simple")
-summary_graph_builder.add_edge("step_c_cluster_themes_simple", "build_signal_panels")
-summary_graph_builder.add_edge("step_c_cluster_themes_simple", "detect_dissent")
+summary_graph_builder.add_edge("step_c_cluster_themes_simple", "aggregate_theme_signals")
+summary_graph_builder.add_edge("aggregate_theme_signals", "build_signal_panels")
+summary_graph_builder.add_edge("aggregate_theme_signals", "detect_dissent")
 summary_graph_builder.add_edge(["build_signal_panels", "detect_dissent"], "build_executive_consensus_card")
 summary_graph_builder.add_edge("build_signal_panels", "build_theme_leaderboard")
 summary_graph_builder.add_edge("build_signal_panels", "build_evidence_board")
-summary_graph_builder.add_edge("build_signal_panels", "build_sentiment_emotion_heatmap")
+summary_graph_builder.add_edge("step_c_cluster_themes_simple", "build_sentiment_emotion_heatmap")
 summary_graph_builder.add_edge(
     ["step_c_cluster_themes_simple", "build_executive_consensus_card", "build_evidence_board"], "build_llm_payload"
 )
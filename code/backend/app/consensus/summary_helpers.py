@@ -1,6 +1,12 @@
 import json
+import uuid
 
+from collections import defaultdict
+from collections.abc import Iterable
 from difflib import SequenceMatcher
+from enum import Enum
+from types import NoneType, UnionType
+from typing import Any, Union, get_args, get_origin
 
 import numpy as np
 import pandas as pd
@@ -9,6 +15,7 @@ from app.types import (
     Actionability,
     Category,
     DeliveryStatus,
+    Dimensions,
     EvidenceType,
     ImpactDirection,
     IsAgreeing,
@@ -40,31 +47,65 @@ _EVIDENCE_WEIGHTS = {
 }
 
 
-def _confidence_factor(confidency: float) -> float:
-    return min(1.4, max(0.0, 0.6 + 0.8 * confidency))
+def _dimension_column(annotation: Any, values: list[Any]) -> Any:
+    nullable = get_origin(annotation) in (Union, UnionType) and NoneType in get_args(annotation)
+    if nullable:
+        annotation = next(arg for arg in get_args(annotation) if arg is not NoneType)
 
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        # All members as categories, so that codes are the same in every report of the category
+        return pd.Categorical(values, categories=list(annotation))
+    if annotation is float:
+        return pd.array(values, dtype="Float32") if nullable else np.array(values, dtype=np.float32)
+    if annotation is bool:
+        return pd.array(values, dtype="boolean") if nullable else np.array(values, dtype=bool)
+    # Texts and themes stay Python strings
+    return values
 
-def _relevancy_factor(relevancy: float) -> float:
-    return 0.5 + 0.5 * max(0.0, min(1.0, relevancy))
+
+def dimensions_frame(
+    message_ids: Iterable[uuid.UUID], dimensions: list[Dimensions], schema: type[Dimensions]
+) -> pd.DataFrame:
+    """
+    One row per message with an `id` column and a column per field of `schema`, typed from its annotations:
+    enums as categoricals, scores as float32, flags as bools (nullable if optional), strings as objects.
+    """
+    columns: dict[str, Any] = {"id": list(message_ids)}
+    for name, field in schema.model_fields.items():
+        columns[name] = _dimension_column(field.annotation, [getattr(dimensions_, name) for dimensions_ in dimensions])
+
+    return pd.DataFrame(columns)
+
+
+def _confidence_factor(confidence: pd.Series) -> pd.Series:
+    return (0.6 + 0.8 * confidence.astype(float)).clip(0.0, 1.4)
+
+
+def _relevancy_factor(relevancy: pd.Series) -> pd.Series:
+    return 0.5 + 0.5 * relevancy.astype(float).clip(0.0, 1.0)
 
 
-def _evidence_type_factor(evidence_type: EvidenceType) -> float:
-    return _EVIDENCE_WEIGHTS.get(evidence_type, 0.9)
+def _evidence_type_factors(evidence_types: pd.Series) -> pd.Series:
+    return evidence_types.map(_EVIDENCE_WEIGHTS).astype(float).fillna(0.9)
 
 
-def _is_critical_opinion_factor(is_critical_opinion: bool) -> float:
-    return 1.1 if is_critical_opinion else 0.9
+def _is_critical_opinion_factor(is_critical_opinion: pd.Series) -> pd.Series:
+    return pd.Series(np.where(is_critical_opinion.astype(bool), 1.1, 0.9), index=is_critical_opinion.index)
 
 
-def compute_weight_row(row: pd.Series) -> float:
+def compute_weights(df: pd.DataFrame) -> pd.Series:
+    """
+    Weight of each row, the product of its relevancy, confidence, evidence type and critical opinion factors,
+    clipped to [0.2, 2.0].
+    """
     w = (
-        _relevancy_factor(row.get("relevancy", 0.0))
-        * _confidence_factor(row.get("confidence", 0.0))
-        * _evidence_type_factor(row.get("evidence_type"))
-        * _is_critical_opinion_factor(row.get("is_critical_opinion", False))
+        _relevancy_factor(df["relevancy"])
+        * _confidence_factor(df["confidence"])
+        * _evidence_type_factors(df["evidence_type"])
+        * _is_critical_opinion_factor(df["is_critical_opinion"])
     )
 
-    return max(0.2, min(2.0, w))
+    return w.clip(0.2, 2.0)
 
 
 def _tokenize(s: str) -> list[str]:
@@ -110,6 +151,199 @@ def cluster_similarity(t1: str, t2: str) -> float:
     return max(j_tok, j_char, d)
 
 
+def _count_postings(index: dict[str, list[int]], keys: set[str], size: int) -> np.ndarray:
+    """Per cluster id, the number of `keys` whose posting list contains it."""
+    postings = [index[key] for key in keys if key in index]
+    if not postings:
+        return np.zeros(size, dtype=np.int64)
+    return np.bincount(np.concatenate(postings), minlength=size)
+
+
+def _jaccards(shared: np.ndarray, size: int, sizes: np.ndarray) -> np.ndarray:
+    """`_jaccard` of one set with `size` elements against many, from the sizes of their intersections."""
+    return np.divide(shared, size + sizes - shared, out=np.zeros(len(shared)), where=shared > 0)
+
+
+def _ranks_before(sim: float, cluster_id: int, other_sim: float, other_id: int) -> bool:
+    """Ties go to the earlier cluster."""
+    return sim > other_sim or (sim == other_sim and cluster_id < other_id)
+
+
+def _may_rank_first(
+    bound: float,
+    cluster_id: int,
+    sim_threshold: float,
+    floor_sim: float,
+    floor_id: int,
+    best_sim: float,
+    best_id: int,
+) -> bool:
+    """Whether a cluster whose similarity is at most `bound` can still be the one a theme is assigned to."""
+    return (
+        bound >= sim_threshold
+        and not _ranks_before(floor_sim, floor_id, bound, cluster_id)
+        and _ranks_before(bound, cluster_id, best_sim, best_id)
+    )
+
+
+def cluster_themes(themes: list[str], sim_threshold: float) -> dict[str, int]:
+    """
+    Greedily assigns each theme, in order, to the earlier cluster whose label (its first theme) is the most similar
+    by `cluster_similarity`, if that reaches `sim_threshold`, and otherwise opens a new cluster.
+    The token and bigram Jaccard of all clusters follow from the posting counts of inverted indexes;
+    `SequenceMatcher` runs only where its exact length and character count bounds could still beat the best cluster,
+    so the result is the same as scoring every cluster in full.
+    Returns the cluster id of each theme.
+    """
+    label_lengths = np.zeros(len(themes), dtype=np.int64)
+    label_token_counts = np.zeros(len(themes), dtype=np.int64)
+    label_bigram_counts = np.zeros(len(themes), dtype=np.int64)
+    # One matcher per cluster with the label as second sequence, which `SequenceMatcher` preprocesses
+    matchers: list[SequenceMatcher] = []
+    token_index: defaultdict[str, list[int]] = defaultdict(list)
+    bigram_index: defaultdict[str, list[int]] = defaultdict(list)
+    theme_to_cluster: dict[str, int] = {}
+
+    for theme in themes:
+        text = theme.lower()
+        tokens = set(_tokenize(text))
+        bigrams = _char_ngrams(text, 2)
+
+        # Any shared character can make `SequenceMatcher.ratio` positive, so every cluster is a candidate
+        candidates = np.arange(len(matchers))
+        shared_tokens = _count_postings(token_index, tokens, len(matchers))
+        shared_bigrams = _count_postings(bigram_index, bigrams, len(matchers))
+
+        best_sim, best_id = 0.0, -1
+        if len(candidates) > 0:
+            jaccards = np.maximum(
+                _jaccards(shared_tokens[candidates], len(tokens), label_token_counts[candidates]),
+                _jaccards(shared_bigrams[candidates], len(bigrams), label_bigram_counts[candidates]),
+            )
+            lengths = label_lengths[candidates]
+            # Upper bound of `SequenceMatcher.ratio`, computed like `SequenceMatcher.real_quick_ratio`
+            length_bounds = 2.0 * np.minimum(len(text), lengths) / (len(text) + lengths)
+            bounds = np.maximum(jaccards, length_bounds)
+
+            # The best cluster is at least as similar as the one with the highest Jaccard
+            floor_sim, floor_id = float(jaccards.max()), int(candidates[np.argmax(jaccards)])
+
+            for i in np.lexsort((candidates, -bounds)):
+                cluster_id = int(candidates[i])
+                if not _may_rank_first(
+                    float(bounds[i]), cluster_id, sim_threshold, floor_sim, floor_id, best_sim, best_id
+                ):
+                    break
+
+                sim = float(jaccards[i])
+                if length_bounds[i] > sim:
+                    matcher = matchers[cluster_id]
+                    matcher.set_seq1(text)
+                    quick_bound = max(sim, matcher.quick_ratio())
+                    if not _may_rank_first(
+                        quick_bound, cluster_id, sim_threshold, floor_sim, floor_id, best_sim, best_id
+                    ):
+                        continue
+                    sim = max(sim, matcher.ratio())
+
+                if _ranks_before(sim, cluster_id, best_sim, best_id):
+                    best_sim, best_id = sim, cluster_id
+
+        if best_id >= 0 and best_sim >= sim_threshold:
+            theme_to_cluster[theme] = best_id
+            continue
+
+        cluster_id = len(matchers)
+        theme_to_cluster[theme] = cluster_id
+        matchers.append(SequenceMatcher(None, "", text))
+        label_lengths[cluster_id] = len(text)
+        label_token_counts[cluster_id] = len(tokens)
+        label_bigram_counts[cluster_id] = len(bigrams)
+        for token in tokens:
+            token_index[token].append(cluster_id)
+        for bigram in bigrams:
+            bigram_index[bigram].append(cluster_id)
+
+    return theme_to_cluster
+
+
+def _tfidf_matrix(texts: list[str], ngram_sizes: tuple[int, ...]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sparse TF-IDF matrix of the character n-grams of `texts`, padded with a space on each side, in CSR form
+    (`indptr`, n-gram ids, weights). Uses smoothed IDF and L2-normalized rows, so that dot products are cosines.
+    """
+    vocabulary: dict[str, int] = {}
+    rows: list[int] = []
+    ngram_ids: list[int] = []
+    for row, text in enumerate(texts):
+        padded = f" {text} "
+        for n in ngram_sizes:
+            for i in range(len(padded) - n + 1):
+                rows.append(row)
+                ngram_ids.append(vocabulary.setdefault(padded[i : i + n], len(vocabulary)))
+
+    # Term frequencies per (row, n-gram), sorted by row
+    pairs, counts = np.unique(
+        np.array(rows, dtype=np.int64) * max(1, len(vocabulary)) + np.array(ngram_ids, dtype=np.int64),
+        return_counts=True,
+    )
+    pair_rows, pair_ngram_ids = np.divmod(pairs, max(1, len(vocabulary)))
+
+    document_frequencies = np.bincount(pair_ngram_ids, minlength=len(vocabulary))
+    idf = np.log((1 + len(texts)) / (1 + document_frequencies)) + 1
+    weights = counts * idf[pair_ngram_ids]
+    norms = np.sqrt(np.bincount(pair_rows, weights=weights**2, minlength=len(texts)))
+    weights = weights / norms[pair_rows]
+
+    indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pair_rows, minlength=len(texts)), out=indptr[1:])
+    return indptr, pair_ngram_ids, weights
+
+
+def cluster_themes_tfidf(
+    themes: list[str], sim_threshold: float, ngram_sizes: tuple[int, ...] = (2, 3)
+) -> dict[str, int]:
+    """
+    Greedy clustering like `cluster_themes`, scored by the cosine similarity of character n-gram TF-IDF vectors.
+    The vectors of all themes are built at once; the similarities of a theme to all cluster labels are one sparse
+    matrix-vector product over the label columns of its n-grams.
+    Returns the cluster id of each theme.
+    """
+    indptr, ngram_ids, weights = _tfidf_matrix([theme.lower() for theme in themes], ngram_sizes)
+
+    # Per n-gram, the clusters whose label contains it and the label's weight
+    posting_clusters: defaultdict[int, list[int]] = defaultdict(list)
+    posting_weights: defaultdict[int, list[float]] = defaultdict(list)
+    n_clusters = 0
+    theme_to_cluster: dict[str, int] = {}
+
+    for row, theme in enumerate(themes):
+        row_ngram_ids = ngram_ids[indptr[row] : indptr[row + 1]].tolist()
+        row_weights = weights[indptr[row] : indptr[row + 1]]
+
+        clusters = [posting_clusters.get(ngram_id, []) for ngram_id in row_ngram_ids]
+        if n_clusters > 0 and any(clusters):
+            sims = np.bincount(
+                np.concatenate(clusters).astype(np.int64),
+                weights=np.concatenate([posting_weights[ngram_id] for ngram_id in row_ngram_ids])
+                * np.repeat(row_weights, [len(c) for c in clusters]),
+                minlength=n_clusters,
+            )
+            # `argmax` returns the earliest cluster on ties
+            best_id = int(np.argmax(sims))
+            if sims[best_id] > 0 and sims[best_id] >= sim_threshold:
+                theme_to_cluster[theme] = best_id
+                continue
+
+        theme_to_cluster[theme] = n_clusters
+        for ngram_id, weight in zip(row_ngram_ids, row_weights.tolist(), strict=True):
+            posting_clusters[ngram_id].append(n_clusters)
+            posting_weights[ngram_id].append(weight)
+        n_clusters += 1
+
+    return theme_to_cluster
+
+
 def pick_cluster_label(theme_series: pd.Series, weight_series: pd.Series) -> str:
     """
     Choose a representative label for a cluster:
@@ -133,42 +367,6 @@ def pick_cluster_label(theme_series: pd.Series, weight_series: pd.Series) -> str
     return top["theme"]
 
 
-def consensus_score_for_group(g: pd.DataFrame, option_col: str, allowed_options: list[str]) -> dict[str, object]:
-    """
-    Compute weighted option shares and consensus score for a group of rows (one theme).
-    Consensus = round(100 * (p - 1/m) / (1 - 1/m)), m = len(allowed_options)
-    where p is the dominant option's weighted share.
-    """
-    # Weighted counts per option (only among allowed options)
-    weights = {opt: 0.0 for opt in allowed_options}
-    for opt, w in zip(g[option_col], g["weight_score_algo"], strict=True):
-        if opt in weights:
-            weights[opt] += float(w)
-
-    total_w = sum(weights.values())
-    if total_w <= 0:
-        # No signal for this option set
-        return {
-            "option_weights": weights,
-            "option_shares": {k: 0.0 for k in allowed_options},
-            "dominant_option": None,
-            "consensus": 0,
-        }
-
-    shares = {k: (v / total_w) for k, v in weights.items()}
-    dominant_option, p = max(shares.items(), key=lambda kv: kv[1])  # (opt, share)
-    m = max(1, len(allowed_options))
-    # If m == 1, consensus is always 100; else use formula
-    consensus = 100 if m == 1 else int(round(100.0 * (p - 1.0 / m) / (1.0 - 1.0 / m)))
-
-    return {
-        "option_weights": weights,
-        "option_shares": shares,
-        "dominant_option": dominant_option,
-        "consensus": max(0, min(100, consensus)),
-    }
-
-
 _SENTIMENT_SCORE = {
     Sentiment.POSITIVE: 1.0,
     Sentiment.NEUTRAL: 0.0,
@@ -176,114 +374,165 @@ _SENTIMENT_SCORE = {
 }
 
 
-def sentiment_score(sentiment: Sentiment) -> float:
-    return _SENTIMENT_SCORE.get(sentiment, 0.0)
+def _group_sums(codes: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    # `np.bincount` of no rows is int64, whatever the weights
+    return np.bincount(codes, weights=values, minlength=n_groups).astype(float, copy=False)
 
 
-def weighted_average(series_values: pd.Series, series_weights: pd.Series) -> float | None:
-    vals = series_values.to_numpy()
-    ws = series_weights.to_numpy()
+def _group_weighted_averages(codes: np.ndarray, values: np.ndarray, weights: np.ndarray, n_groups: int) -> np.ndarray:
+    """Weighted average per group over the rows with finite value and weight, NaN where the weights sum to <= 0."""
+    mask = np.isfinite(values) & np.isfinite(weights)
+    weight_sums = _group_sums(codes, np.where(mask, weights, 0.0), n_groups)
+    value_sums = _group_sums(codes, np.where(mask, values * weights, 0.0), n_groups)
+    return np.divide(value_sums, weight_sums, out=np.full(n_groups, np.nan), where=weight_sums > 0)
 
-    mask = np.isfinite(vals) & np.isfinite(ws)
-    if not mask.any() or ws[mask].sum() <= 0:
-        return None
 
-    return float(np.average(vals[mask], weights=ws[mask]))
-
-
-def emotion_distribution(g: pd.DataFrame) -> dict[str, float]:
+def compute_theme_signals(
+    df: pd.DataFrame, theme_col: str, option_col: str, allowed_options: list[str]
+) -> pd.DataFrame:
     """
-    Weighted distribution of emotion labels in group, normalized to 1.0 (if total > 0).
+    One row per theme, in sorted order, with the signals of the panels and the dissent detection:
+      - consensus, dominant_option, dominant_share, option_shares: weighted shares among the allowed options,
+        consensus = round(100 * (p - 1/m) / (1 - 1/m)) of the dominant share p, m = len(allowed_options)
+      - polarity (weighted sentiment score in [-1,1]), avg_confidence (weighted, None without weight)
+      - emotion_dist (emotion -> weighted share)
+      - mismatch_share: weighted share of stance-sentiment mismatches
+      - bimodal: two options each hold >= 0.30 share
+      - total_weight, count
+    All per-theme sums are a single `np.bincount` over the rows.
     """
-    total_w = g["weight_score_algo"].sum()
-    if total_w <= 0:
-        return {}
-    dist = (g.groupby("emotion")["weight_score_algo"].sum() / total_w).to_dict()
-    # Ensure standard ordering if needed; otherwise just return dict
-    return {str(k): float(v) for k, v in dist.items()}
+    theme_codes, themes = pd.factorize(df[theme_col], sort=True)
+    rows = theme_codes >= 0
+    x = df.loc[rows]
+    codes = theme_codes[rows]
+    n_themes = len(themes)
+    w = x["weight_score_algo"].to_numpy(dtype=float)
+
+    total_weight = _group_sums(codes, w, n_themes)
+    count = np.bincount(codes, minlength=n_themes)
+
+    # Consensus over the weights of the allowed options
+    option_weights = np.column_stack(
+        [_group_sums(codes, np.where(x[option_col].eq(option), w, 0.0), n_themes) for option in allowed_options]
+    )
+    option_total = np.zeros(n_themes)
+    for i in range(len(allowed_options)):
+        option_total = option_total + option_weights[:, i]
+    has_signal = option_total > 0
+    shares = np.divide(
+        option_weights, option_total[:, None], out=np.zeros_like(option_weights), where=has_signal[:, None]
+    )
+    dominant = shares.argmax(axis=1)
+    p = np.where(has_signal, shares[np.arange(n_themes), dominant], 0.0)
+    m = max(1, len(allowed_options))
+    consensus = np.full(n_themes, 100) if m == 1 else np.rint(100.0 * (p - 1.0 / m) / (1.0 - 1.0 / m))
+    consensus = np.clip(consensus, 0, 100).astype(int)
+
+    sorted_shares = -np.sort(-shares, axis=1)
+    bimodal = (
+        (sorted_shares[:, 0] >= 0.30) & (sorted_shares[:, 1] >= 0.30)
+        if len(allowed_options) >= 2
+        else np.zeros(n_themes, dtype=bool)
+    )
 
+    sentiment_scores = x["sentiment"].map(_SENTIMENT_SCORE).astype(float).fillna(0.0).to_numpy()
+    polarity = _group_weighted_averages(codes, sentiment_scores, w, n_themes)
+    avg_confidence = _group_weighted_averages(codes, x["confidence"].to_numpy(dtype=float), w, n_themes)
+
+    # Emotion weights pivoted to themes x emotions
+    emotion_codes, emotions = pd.factorize(x["emotion"], sort=True)
+    has_emotion = emotion_codes >= 0
+    cells = codes[has_emotion] * len(emotions) + emotion_codes[has_emotion]
+    emotion_weights = _group_sums(cells, w[has_emotion], n_themes * len(emotions)).reshape(n_themes, len(emotions))
+    emotion_counts = np.bincount(cells, minlength=n_themes * len(emotions)).reshape(n_themes, len(emotions))
+
+    # Truthiness of the stance; every `IsAgainst` member is truthy, so only positive sentiment counts as mismatch
+    stance = x["is_against"].astype(bool)
+    is_mismatch = (stance & x["sentiment"].eq(Sentiment.POSITIVE)) | (~stance & x["sentiment"].eq(Sentiment.NEGATIVE))
+    mismatch_weight = _group_sums(codes, np.where(is_mismatch.to_numpy(), w, 0.0), n_themes)
+    mismatch_share = np.divide(mismatch_weight, total_weight, out=np.zeros(n_themes), where=total_weight > 0)
+
+    return pd.DataFrame(
+        {
+            "theme_label": themes,
+            "consensus": consensus,
+            "dominant_option": [
+                allowed_options[i] if signal else None for i, signal in zip(dominant, has_signal, strict=True)
+            ],
+            "dominant_share": p,
+            "option_shares": [
+                dict(zip(allowed_options, map(float, theme_shares), strict=True)) for theme_shares in shares
+            ],
+            "polarity": np.nan_to_num(polarity, nan=0.0),
+            "avg_confidence": [None if np.isnan(value) else float(value) for value in avg_confidence],
+            "emotion_dist": [
+                {
+                    str(emotion): float(weight / theme_weight)
+                    for emotion, weight, present in zip(emotions, theme_weights, theme_counts, strict=True)
+                    if present
+                }
+                if theme_weight > 0
+                else {}
+                for theme_weights, theme_counts, theme_weight in zip(
+                    emotion_weights, emotion_counts, total_weight, strict=True
+                )
+            ],
+            "mismatch_share": mismatch_share,
+            "bimodal": bimodal,
+            "total_weight": total_weight,
+            "count": count,
+        }
+    )
 
-def top_evidence_items(g: pd.DataFrame, top_n: int) -> list[dict[str, object]]:
-    """
-    Rank items by (ev_factor * w). Returns list of dicts:
-    { 'evidence_type': ..., 'score': float, 'text': ..., 'w': float }
-    """
-    # Prepare scores
-    scores = []
-    for ev, w, txt in zip(g["evidence_type"], g["weight_score_algo"], g["text"], strict=True):
-        evf = _evidence_type_factor(ev)
-        s = evf * float(w)
-        scores.append((s, ev, float(w), txt))
-    scores.sort(key=lambda x: x[0], reverse=True)
-    out = []
-    for s, ev, w, txt in scores[: max(0, int(top_n))]:
-        out.append({"evidence_type": ev, "score": float(s), "w": float(w), "text": txt})
-    return out
-
-
-def representative_quotes(g: pd.DataFrame, quotes_n: int) -> list[str]:
+
+def _top_n_per_group(codes: np.ndarray, scores: np.ndarray, top_n: int) -> tuple[np.ndarray, np.ndarray]:
     """
-    Top N 'text' entries by weight.
-    Assumes 'text' is already safe/cleaned in your data.
+    Positions of the `top_n` highest scores of each group code, grouped by code and ranked from 0 within a group,
+    and their ranks. Ties keep their row order.
     """
-    tmp = g[["text", "weight_score_algo"]].copy()
-    tmp = tmp.sort_values("weight_score_algo", ascending=False)
-    return tmp["text"].head(max(0, int(quotes_n))).tolist()
-
-
-def consensus_for_group(
-    g: pd.DataFrame, option_col: str, allowed_options: list[str]
-) -> tuple[int, str | None, dict[str, float]]:
-    # Weighted counts per option
-    weights = {opt: 0.0 for opt in allowed_options}
-    for opt, w in zip(g[option_col], g["weight_score_algo"], strict=True):
-        if opt in weights:
-            weights[opt] += float(w)
-
-    total_w = sum(weights.values())
-    shares = {k: (v / total_w) if total_w > 0 else 0.0 for k, v in weights.items()}
-    if total_w > 0:
-        dominant_option, p = max(shares.items(), key=lambda kv: kv[1])
-    else:
-        dominant_option, p = (None, 0.0)
-
-    m = max(1, len(allowed_options))
-    consensus = 100 if m == 1 else int(round(100.0 * (p - 1.0 / m) / (1.0 - 1.0 / m)))
-    consensus = max(0, min(100, consensus))
-    return consensus, dominant_option, shares
+    order = np.lexsort((-scores, codes))
+    sorted_codes = codes[order]
+    ranks = np.arange(len(order)) - np.searchsorted(sorted_codes, sorted_codes)
+    keep = ranks < max(0, int(top_n))
+    return order[keep], ranks[keep]
 
 
-def mismatch_weight_share(g: pd.DataFrame) -> float:
+def top_evidence_table(df: pd.DataFrame, theme_col: str, top_n: int) -> pd.DataFrame:
     """
-    Stance-sentiment mismatch definition:
-      - is_against == 'true'   AND sentiment == 'positive'
-      - is_against == 'false'  AND sentiment == 'negative'
-    'mixed' is ignored for mismatch.
-    Returns weighted share in [0,1].
+    The `top_n` items of each theme ranked by score = ev_factor * w, in one pass over all themes.
+    Columns: theme_label, rank (from 0), evidence_type, score, w, text; sorted by theme_label and rank.
     """
-    if "is_against" not in g.columns or "sentiment" not in g.columns:
-        return 0.0
-    total_w = float(g["weight_score_algo"].sum())
-    if total_w <= 0:
-        return 0.0
-
-    def _is_mismatch(row: pd.Series) -> bool:
-        stance = row.get("is_against", False)
-        sent = row.get("sentiment", Sentiment.NEUTRAL)
-        return (stance and sent == Sentiment.POSITIVE) or (not stance and sent == Sentiment.NEGATIVE)
-
-    mismatch_w = g.loc[g.apply(_is_mismatch, axis=1), "weight_score_algo"].sum()
-    return float(mismatch_w) / total_w
+    theme_codes, themes = pd.factorize(df[theme_col], sort=True)
+    rows = np.flatnonzero(theme_codes >= 0)
+    w = df["weight_score_algo"].to_numpy(dtype=float)[rows]
+    scores = _evidence_type_factors(df["evidence_type"]).to_numpy()[rows] * w
+    top, ranks = _top_n_per_group(theme_codes[rows], scores, top_n)
+
+    return pd.DataFrame(
+        {
+            "theme_label": np.asarray(themes)[theme_codes[rows[top]]],
+            "rank": ranks,
+            "evidence_type": df["evidence_type"].to_numpy()[rows[top]],
+            "score": scores[top],
+            "w": w[top],
+            "text": df["text"].to_numpy()[rows[top]],
+        }
+    )
 
 
-def bimodal_flag(option_shares: dict[str, float]) -> bool:
-    """True if two options each hold ≥ 0.30 share."""
-    if not option_shares:
-        return False
-    shares = sorted(option_shares.values(), reverse=True)
-    if len(shares) < 2:
-        return False
-    return (shares[0] >= 0.30) and (shares[1] >= 0.30)
+def representative_quotes(df: pd.DataFrame, theme_col: str, quotes_n: int) -> dict[str, list[str]]:
+    """
+    Top N 'text' entries by weight of each theme, in one pass over all themes; ties keep their row order.
+    Assumes 'text' is already safe/cleaned in your data.
+    """
+    theme_codes, themes = pd.factorize(df[theme_col], sort=True)
+    rows = np.flatnonzero(theme_codes >= 0)
+    top, _ = _top_n_per_group(theme_codes[rows], df["weight_score_algo"].to_numpy(dtype=float)[rows], quotes_n)
+
+    quotes: dict[str, list[str]] = {theme: [] for theme in themes}
+    for theme_code, text in zip(theme_codes[rows[top]], df["text"].to_numpy()[rows[top]], strict=True):
+        quotes[themes[theme_code]].append(text)
+    return quotes
 
 
 def dominant_share(row: pd.Series) -> float:
@@ -1,14 +1,122 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, cast
 
-from fastapi import Request
+from alembic import command
+from alembic.config import Config
+from fastapi import FastAPI, Request
+from sqlalchemy import text
 from sqlalchemy.engine import Connection, Engine
-from sqlmodel import Session, SQLModel
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
+from app.checkpoints import setup_checkpointer
+from app.pool import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool, engine_pool_options
+from app.settings import settings
 
-def get_session(request: Request) -> Generator[Session, None, None]:
-    with Session(request.app.state.engine) as session:
+
+def create_database_engine() -> Engine:
+    return create_engine(
+        settings.database_url,
+        poolclass=InstrumentedQueuePool,
+        **engine_pool_options(),
+    )
+
+
+def create_async_database_engine() -> AsyncEngine:
+    return create_async_engine(
+        settings.database_url,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        **engine_pool_options(),
+    )
+
+
+class ThreadedSession:
+    """
+    Awaitable facade over a sync `Session`, used when `database_async` is disabled.
+    Blocking calls run in the threadpool, so the async routers work unchanged on the sync engine.
+    """
+
+    def __init__(self, session: Session) -> None:
+        self.sync_session = session
+
+    def add(self, instance: object) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances: Iterable[object]) -> None:
+        self.sync_session.add_all(instances)
+
+    async def get(self, *args: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.get, *args, **kwargs)
+
+    async def exec(self, *args: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.exec, *args, **kwargs)
+
+    async def execute(self, *args: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.execute, *args, **kwargs)
+
+    async def scalar(self, *args: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.scalar, *args, **kwargs)
+
+    async def delete(self, instance: object) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance: object, attribute_names: Iterable[str] | None = None) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+@asynccontextmanager
+async def open_session(app: FastAPI) -> AsyncIterator[AsyncSession]:
+    if settings.database_async:
+        async with AsyncSession(app.state.async_engine, expire_on_commit=False) as session:
+            yield session
+        return
+
+    threaded_session = ThreadedSession(Session(app.state.engine, expire_on_commit=False))
+    try:
+        yield cast(AsyncSession, threaded_session)
+    finally:
+        await threaded_session.close()
+
+
+async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with open_session(request.app) as session:
         yield session
 
 
-def create_db_and_tables(engine: Engine | Connection) -> None:
-    SQLModel.metadata.create_all(engine)
+MIGRATIONS_DIRECTORY = Path(__file__).parent / "migrations"
+MIGRATIONS_LOCK_KEY = 0x100B
+
+
+def run_migrations(connection: Connection) -> None:
+    """
+    Upgrades the database to the latest migration in `app/migrations`, then the LangGraph checkpoint tables.
+    A session-level advisory lock makes concurrently starting workers wait for each other.
+    """
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIRECTORY))
+    config.attributes["connection"] = connection
+
+    connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATIONS_LOCK_KEY})
+    connection.commit()
+    try:
+        command.upgrade(config, "head")
+        setup_checkpointer()
+    finally:
+        connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATIONS_LOCK_KEY})
+        connection.commit()
@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import json
+import random
+import time
+
+from enum import Enum
+from types import NoneType, UnionType
+from typing import Any, Union, cast, get_args, get_origin
+
+from annotated_types import Ge, Le
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+
+CHARACTERS_PER_TOKEN_ESTIMATE = 4
+
+FAKE_THEMES = (
+    "Deployment Speed",
+    "deployment speed",
+    "Faster Deployments",
+    "SSO/Access",
+    "Access Management",
+    "Onboarding",
+    "Onboarding Docs",
+    "Test Coverage",
+    "Tech Debt",
+    "Meeting Load",
+    "Team Communication",
+    "Budget",
+    "Hiring",
+    "Release Planning",
+)
+
+FAKE_WORDS = (
+    "we",
+    "should",
+    "the",
+    "team",
+    "release",
+    "process",
+    "faster",
+    "budget",
+    "risk",
+    "users",
+    "data",
+    "shows",
+    "might",
+    "improve",
+    "blocked",
+    "deployment",
+    "quality",
+    "time",
+)
+
+
+def fake_sentence(rng: random.Random) -> str:
+    return " ".join(rng.choices(FAKE_WORDS, k=rng.randint(6, 14))).capitalize() + "."
+
+
+def fake_value(name: str, annotation: Any, metadata: list[Any], rng: random.Random) -> Any:
+    if get_origin(annotation) in (Union, UnionType):
+        annotation = next(arg for arg in get_args(annotation) if arg is not NoneType)
+
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return rng.choice(list(annotation))
+    if annotation is bool:
+        # Flagged notes are dropped from the summary, keep them as rare as in real discussions
+        return rng.random() < (0.05 if name == "risk_flag" else 0.5)
+    if annotation in (int, float):
+        low = cast(float, next((item.ge for item in metadata if isinstance(item, Ge)), 0))
+        high = cast(float, next((item.le for item in metadata if isinstance(item, Le)), 100))
+        return rng.randint(int(low), int(high)) if annotation is int else rng.uniform(low, high)
+    if annotation is str:
+        return rng.choice(FAKE_THEMES) if name == "theme" else fake_sentence(rng)
+    if get_origin(annotation) is list and get_args(annotation) == (str,):
+        return [fake_sentence(rng) for _ in range(3)]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return fake_object(annotation, rng)
+
+    raise TypeError(f"Cannot fake a value of type {annotation!r}")
+
+
+def fake_object(schema: type[BaseModel], rng: random.Random, **values: Any) -> BaseModel:
+    for name, field in schema.model_fields.items():
+        if name not in values:
+            values[name] = fake_value(name, field.annotation, field.metadata, rng)
+    return schema.model_validate(values)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for the Azure OpenAI model, for benchmarks and runs without API access.
+    Select it like the real model, through `configurable={"llm": FakeChatModel(...)}`.
+    Structured outputs are valid instances of the requested schema, seeded from the prompt (the opinion for
+    dimensions, so that batched and single extractions agree) and `seed`. Each call takes `latency` seconds.
+    """
+
+    latency: float = 0.0
+    seed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"latency": self.latency, "seed": self.seed}
+
+    def random(self, *parts: str) -> random.Random:
+        digest = hashlib.sha256("\x00".join((str(self.seed), *parts)).encode()).digest()
+        return random.Random(int.from_bytes(digest[:8]))
+
+    def respond(self, messages: list[BaseMessage], schema: type[BaseModel] | type[Enum] | None) -> ChatResult:
+        prompt = "\n".join(message.text for message in messages)
+        user_prompt = messages[-1].text
+
+        if schema is None:
+            output = fake_sentence(self.random(prompt))
+        elif issubclass(schema, Enum):
+            output = json.dumps(self.random(schema.__name__, prompt).choice(list(schema)).value)
+        elif "items" in schema.model_fields:
+            # Batched dimension extraction, see `CATEGORY_BATCH_EXTRACTION_PROMPT_TEMPLATE`
+            item_schema = get_args(schema.model_fields["items"].annotation)[0]
+            opinions = json.loads(user_prompt.split("Opinions: ", 1)[1])
+            items = [
+                fake_object(item_schema, self.random(item_schema.__name__, opinion["text"]), **opinion)
+                for opinion in opinions
+            ]
+            output = schema.model_validate({"items": items}).model_dump_json()
+        elif "text" in schema.model_fields and "Opinion: " in user_prompt:
+            opinion = user_prompt.split("Opinion: ", 1)[1]
+            # Seeded like the items of a batch, so that the batch size does not change the dimensions
+            dimensions = fake_object(schema, self.random(f"Indexed{schema.__name__}", opinion), text=opinion)
+            output = dimensions.model_dump_json()
+        else:
+            output = fake_object(schema, self.random(schema.__name__, prompt)).model_dump_json()
+
+        message = AIMessage(
+            content=output,
+            usage_metadata={
+                "input_tokens": len(prompt) // CHARACTERS_PER_TOKEN_ESTIMATE,
+                "output_tokens": len(output) // CHARACTERS_PER_TOKEN_ESTIMATE,
+                "total_tokens": (len(prompt) + len(output)) // CHARACTERS_PER_TOKEN_ESTIMATE,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        return self.respond(messages, kwargs.get("response_format"))
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self.respond(messages, kwargs.get("response_format"))
+
+    def with_structured_output(
+        self, schema: dict | type, *, include_raw: bool = False, **kwargs: Any
+    ) -> Runnable[LanguageModelInput, dict | BaseModel]:
+        if not isinstance(schema, type) or not issubclass(schema, (BaseModel, Enum)):
+            raise TypeError(f"FakeChatModel only supports pydantic models and enums as schema, got {schema!r}")
+
+        def parse(message: AIMessage) -> Any:
+            if issubclass(schema, Enum):
+                return schema(json.loads(message.text))
+            return schema.model_validate_json(message.text)
+
+        llm = self.bind(response_format=schema)
+        if include_raw:
+            return llm | RunnableLambda(
+                lambda message: {"raw": message, "parsed": parse(message), "parsing_error": None}
+            )
+        return llm | RunnableLambda(parse)
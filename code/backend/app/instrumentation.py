@@ -0,0 +1,130 @@
+import logging
+import threading
+import time
+import uuid
+
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from pydantic import BaseModel
+
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCallRecord(BaseModel):
+    graph: str | None
+    node: str | None
+    discussion_id: str | None
+    attempt: int
+    latency_seconds: float
+    prompt_tokens: int
+    completion_tokens: int
+    cached: bool
+    error: str | None
+
+
+class LLMCallBreakdown(BaseModel):
+    graph: str | None
+    node: str | None
+    calls: int = 0
+    failures: int = 0
+    retries: int = 0
+    cached: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_seconds_total: float = 0.0
+    latency_seconds_max: float = 0.0
+
+
+class LLMInstrumentationHandler(BaseCallbackHandler):
+    """
+    Records latency, token usage and failures of every chat model call of a report.
+    Calls are tagged through the run metadata: `graph` and `discussion_id` are set by `generate_consensus_report`,
+    `langgraph_node` by LangGraph and `attempt` by the retry loop of the dimension extraction.
+    Each record is logged as JSON on `app.instrumentation` at debug level; `log_breakdown` logs the aggregates per
+    graph node at info level, so that log pipelines can turn them into metrics.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._started: dict[uuid.UUID, tuple[float, dict[str, Any]]] = {}
+        self.records: list[LLMCallRecord] = []
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: uuid.UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), metadata or {})
+
+    def on_llm_end(self, response: LLMResult, *, run_id: uuid.UUID, **kwargs: Any) -> None:
+        prompt_tokens = completion_tokens = 0
+        cached = False
+        for generations in response.generations:
+            for generation in generations:
+                if isinstance(generation, ChatGeneration) and isinstance(generation.message, AIMessage):
+                    if generation.message.usage_metadata is not None:
+                        prompt_tokens += generation.message.usage_metadata["input_tokens"]
+                        completion_tokens += generation.message.usage_metadata["output_tokens"]
+                    cached |= bool(generation.message.response_metadata.get("llm_cache_hit"))
+
+        self.record(run_id, prompt_tokens, completion_tokens, cached, None)
+
+    def on_llm_error(self, error: BaseException, *, run_id: uuid.UUID, **kwargs: Any) -> None:
+        self.record(run_id, 0, 0, False, type(error).__name__)
+
+    def record(
+        self, run_id: uuid.UUID, prompt_tokens: int, completion_tokens: int, cached: bool, error: str | None
+    ) -> None:
+        with self._lock:
+            started_at, metadata = self._started.pop(run_id, (time.perf_counter(), {}))
+
+        record = LLMCallRecord(
+            graph=metadata.get("graph"),
+            node=metadata.get("langgraph_node"),
+            discussion_id=metadata.get("discussion_id"),
+            attempt=metadata.get("attempt", 1),
+            latency_seconds=time.perf_counter() - started_at,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached=cached,
+            error=error,
+        )
+        logger.debug("LLM call %s", record.model_dump_json())
+
+        with self._lock:
+            self.records.append(record)
+
+    def breakdown(self) -> list[LLMCallBreakdown]:
+        """Aggregates the records per graph node, in the order the nodes were first called."""
+        with self._lock:
+            records = list(self.records)
+
+        breakdowns: dict[tuple[str | None, str | None], LLMCallBreakdown] = {}
+        for record in records:
+            breakdown = breakdowns.setdefault(
+                (record.graph, record.node), LLMCallBreakdown(graph=record.graph, node=record.node)
+            )
+            breakdown.calls += 1
+            breakdown.failures += record.error is not None
+            breakdown.retries += record.attempt > 1
+            breakdown.cached += record.cached
+            breakdown.prompt_tokens += record.prompt_tokens
+            breakdown.completion_tokens += record.completion_tokens
+            breakdown.latency_seconds_total += record.latency_seconds
+            breakdown.latency_seconds_max = max(breakdown.latency_seconds_max, record.latency_seconds)
+
+        return list(breakdowns.values())
+
+    def log_breakdown(self, discussion_id: uuid.UUID) -> None:
+        """Logs each aggregate of `breakdown` as JSON, tagged with the discussion."""
+        for breakdown in self.breakdown():
+            logger.info("LLM calls of discussion %s: %s", discussion_id, breakdown.model_dump_json())
@@ -0,0 +1,97 @@
+import uuid
+
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, and_, col, or_, select, update
+
+from app.models import DiscussionReportStatus, ReportJob
+from app.notifications import notify_report_progress
+from app.settings import settings
+from app.types import ReportJobStatus
+
+
+def claim_report_job(session: Session) -> ReportJob | None:
+    """
+    Picks the oldest due job and marks it as running.
+    Running jobs whose worker stopped sending heartbeats (crash, deploy) are picked up again.
+    `FOR UPDATE SKIP LOCKED` lets any number of workers poll the table without handing out a job twice.
+    """
+    now = datetime.now()
+    stale_before = now - timedelta(seconds=settings.report_job_stale_after)
+
+    statement = (
+        select(ReportJob)
+        .where(
+            or_(
+                and_(col(ReportJob.status) == ReportJobStatus.QUEUED, col(ReportJob.scheduled_at) <= now),
+                and_(col(ReportJob.status) == ReportJobStatus.RUNNING, col(ReportJob.heartbeat_at) < stale_before),
+            )
+        )
+        .order_by(col(ReportJob.scheduled_at))
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    db_job = session.exec(statement).first()
+    if db_job is None:
+        return None
+
+    db_job.sqlmodel_update(
+        {
+            "status": ReportJobStatus.RUNNING,
+            "attempts": db_job.attempts + 1,
+            "started_at": now,
+            "heartbeat_at": now,
+            "updated_at": now,
+        }
+    )
+    session.add(db_job)
+    session.commit()
+    session.refresh(db_job)
+    return db_job
+
+
+def touch_report_jobs(session: Session, job_ids: list[uuid.UUID]) -> None:
+    statement = (
+        update(ReportJob)
+        .where(col(ReportJob.id).in_(job_ids), col(ReportJob.status) == ReportJobStatus.RUNNING)
+        .values(heartbeat_at=datetime.now())
+    )
+    session.exec(statement)
+    session.commit()
+
+
+def finish_report_job(session: Session, job_id: uuid.UUID, error: str | None = None) -> None:
+    """
+    Marks a job as succeeded, or on error either reschedules it with a linear backoff
+    or, once `report_job_max_attempts` is reached, fails it and resets the report progress of the discussion
+    so that the report can be requested again.
+    """
+    db_job = session.get(ReportJob, job_id)
+    if db_job is None:
+        return
+
+    now = datetime.now()
+    if error is None:
+        db_job.sqlmodel_update({"status": ReportJobStatus.SUCCEEDED, "error": None, "finished_at": now})
+    elif db_job.attempts < settings.report_job_max_attempts:
+        db_job.sqlmodel_update(
+            {
+                "status": ReportJobStatus.QUEUED,
+                "error": error,
+                "scheduled_at": now + timedelta(seconds=settings.report_job_retry_delay * db_job.attempts),
+            }
+        )
+    else:
+        db_job.sqlmodel_update({"status": ReportJobStatus.FAILED, "error": error, "finished_at": now})
+
+        db_status = session.get(DiscussionReportStatus, db_job.discussion_id)
+        if db_status is not None:
+            # A failed regeneration leaves the previous report in place
+            report_progress = None if db_status.report_id is None else 1
+            db_status.sqlmodel_update({"report_progress": report_progress, "updated_at": now})
+            session.add(db_status)
+            notify_report_progress(session, db_status.discussion_id, report_progress)
+
+    db_job.updated_at = now
+    session.add(db_job)
+    session.commit()
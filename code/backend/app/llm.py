@@ -1,11 +1,48 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from functools import cache
+from typing import Any
+
+import openai
+
 from langchain_openai import AzureChatOpenAI
 
+from app.llm_cache import SQLLLMCache, create_llm_cache
+from app.rate_limit import RateLimiter
 from app.settings import settings
 
 
-llm = AzureChatOpenAI(
-    azure_endpoint=settings.azure_openai_endpoint,
-    api_key=settings.azure_openai_api_key,
-    api_version=settings.azure_openai_api_version,
-    model=settings.azure_openai_model,
-)
+@cache
+def get_llm_cache() -> SQLLLMCache | None:
+    """Created on first use, so that importing this module does not connect to the cache database."""
+    return create_llm_cache() if settings.llm_cache_enabled else None
+
+
+def create_llm(**kwargs: Any) -> AzureChatOpenAI:
+    return AzureChatOpenAI(
+        azure_endpoint=settings.azure_openai_endpoint,
+        api_key=settings.azure_openai_api_key,
+        api_version=settings.azure_openai_api_version,
+        model=settings.azure_openai_model,
+        cache=get_llm_cache(),
+        **kwargs,
+    )
+
+
+@cache
+def get_llm() -> AzureChatOpenAI:
+    return create_llm()
+
+
+@asynccontextmanager
+async def create_extraction_llm() -> AsyncIterator[AzureChatOpenAI]:
+    """
+    One model per event loop: the connections of an async HTTP client belong to the loop that opened them,
+    and every report job runs the dimension extraction in a loop of its own.
+    """
+    async with openai.DefaultAsyncHttpxClient() as http_async_client:
+        # Dimension extraction retries on its own, so that a 429 pauses all concurrent calls through `rate_limiter`
+        yield create_llm(max_retries=0, http_async_client=http_async_client)
+
+
+rate_limiter = RateLimiter(settings.azure_openai_requests_per_minute, settings.azure_openai_tokens_per_minute)
@@ -0,0 +1,170 @@
+import hashlib
+import threading
+
+from datetime import datetime, timedelta
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+from pydantic import BaseModel
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, col, create_engine, delete, select
+
+from app.database import create_database_engine
+from app.models import LLMCacheEntry, LLMCacheStats
+from app.settings import settings
+
+
+# Expired and surplus entries are swept every this many writes instead of on each one
+SWEEP_INTERVAL = 100
+
+
+def to_serializable(generation: Generation) -> Generation:
+    # Structured output keeps the parsed pydantic model in `additional_kwargs`, which LangChain cannot serialize;
+    # its output parser accepts the dict form as well
+    if not isinstance(generation, ChatGeneration):
+        return generation
+
+    parsed = generation.message.additional_kwargs.get("parsed")
+    if not isinstance(parsed, BaseModel):
+        return generation
+
+    additional_kwargs = {**generation.message.additional_kwargs, "parsed": parsed.model_dump(mode="json")}
+    message = generation.message.model_copy(update={"additional_kwargs": additional_kwargs})
+    return generation.model_copy(update={"message": message})
+
+
+def mark_cached(generation: Generation) -> Generation:
+    # A cached response costs no tokens, which also refunds the rate limiter's reservation
+    if isinstance(generation, ChatGeneration) and isinstance(generation.message, AIMessage):
+        generation.message.usage_metadata = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+        generation.message.response_metadata["llm_cache_hit"] = True
+    return generation
+
+
+class SQLLLMCache(BaseCache):
+    """
+    Content-addressed cache of chat model responses, shared by all consensus graphs.
+    LangChain passes the rendered messages as `prompt` and the model with its call parameters,
+    including the structured output schema, as `llm_string`, so changing any of them is a miss.
+    """
+
+    def __init__(self, engine: Engine, ttl: float, max_entries: int) -> None:
+        self.engine = engine
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        expires_before = datetime.now() - timedelta(seconds=self.ttl)
+        statement = select(LLMCacheEntry.generations).where(
+            col(LLMCacheEntry.key) == self.make_key(prompt, llm_string),
+            col(LLMCacheEntry.created_at) >= expires_before,
+        )
+        with Session(self.engine) as session:
+            generations = session.exec(statement).first()
+
+        with self._lock:
+            if generations is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if generations is None:
+            return None
+        return [mark_cached(generation) for generation in loads(generations)]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        entry = LLMCacheEntry(
+            key=self.make_key(prompt, llm_string),
+            generations=dumps([to_serializable(generation) for generation in return_val]),
+        )
+        with Session(self.engine) as session:
+            session.merge(entry)
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another worker stored the same response in the meantime
+                session.rollback()
+
+        with self._lock:
+            self.writes += 1
+            sweep = self.writes % SWEEP_INTERVAL == 0
+
+        if sweep:
+            self.sweep()
+
+    def sweep(self) -> None:
+        """Drops expired entries and, beyond `max_entries`, the oldest ones."""
+        expires_before = datetime.now() - timedelta(seconds=self.ttl)
+        with Session(self.engine) as session:
+            evictions = session.exec(
+                delete(LLMCacheEntry).where(col(LLMCacheEntry.created_at) < expires_before)
+            ).rowcount
+
+            statement = (
+                select(LLMCacheEntry.created_at)
+                .order_by(col(LLMCacheEntry.created_at).desc())
+                .offset(self.max_entries)
+                .limit(1)
+            )
+            first_surplus_created_at = session.exec(statement).first()
+            if first_surplus_created_at is not None:
+                evictions += session.exec(
+                    delete(LLMCacheEntry).where(col(LLMCacheEntry.created_at) <= first_surplus_created_at)
+                ).rowcount
+
+            session.commit()
+
+        with self._lock:
+            self.evictions += evictions
+
+    def clear(self, **kwargs: Any) -> None:
+        with Session(self.engine) as session:
+            session.exec(delete(LLMCacheEntry))
+            session.commit()
+
+    def stats(self) -> LLMCacheStats:
+        with self._lock:
+            return LLMCacheStats(hits=self.hits, misses=self.misses, writes=self.writes, evictions=self.evictions)
+
+
+class RefreshingLLMCache(BaseCache):
+    """
+    Skips the lookups of `cache` but stores every response in it, replacing the one cached for the same call.
+    Retries of unparseable responses use it, so that a successful retry is what the next run finds.
+    """
+
+    def __init__(self, cache: BaseCache) -> None:
+        self.cache = cache
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.cache.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.cache.clear(**kwargs)
+
+
+def create_llm_cache() -> SQLLLMCache:
+    if settings.llm_cache_database_url is None:
+        # The table is managed by the migrations
+        engine = create_database_engine()
+    else:
+        engine = create_engine(settings.llm_cache_database_url)
+        SQLModel.metadata.create_all(engine, tables=[LLMCacheEntry.__table__])  # type: ignore[attr-defined]
+
+    return SQLLLMCache(engine, settings.llm_cache_ttl, settings.llm_cache_max_entries)
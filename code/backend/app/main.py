@@ -1,3 +1,5 @@
+import asyncio
+import contextlib
 import logging
 
 from collections.abc import AsyncGenerator, Iterable
@@ -7,12 +9,14 @@ import uvicorn
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import create_engine
 
-from app.database import create_db_and_tables
+from app.database import create_async_database_engine, create_database_engine, run_migrations
 from app.logging import HealthCheckFilter
-from app.routers import discussions, messages, reports
+from app.notifications import ReportProgressBroker
+from app.pagination import NEXT_CURSOR_HEADER
+from app.routers import discussions, health, messages, reports
 from app.settings import settings
+from app.worker import ReportWorker
 
 
 logging.getLogger("uvicorn.access").addFilter(HealthCheckFilter())
@@ -20,14 +24,31 @@ logging.getLogger("uvicorn.access").addFilter(HealthCheckFilter())
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    app.state.engine = create_engine(
-        f"postgresql+psycopg://{settings.database_user}:{settings.database_password.get_secret_value()}@{settings.database_host}:{settings.database_port}/{settings.database_name}",
-    )
+    app.state.engine = create_database_engine()
+    app.state.async_engine = create_async_database_engine() if settings.database_async else None
+
+    with app.state.engine.connect() as connection:
+        run_migrations(connection)
+
+    worker = ReportWorker(app.state.engine, settings.report_worker_concurrency)
+    if settings.report_worker_embedded:
+        worker.start()
 
-    create_db_and_tables(app.state.engine)
+    app.state.report_progress_broker = ReportProgressBroker()
+    report_progress_listener = asyncio.create_task(app.state.report_progress_broker.listen())
 
     yield
 
+    report_progress_listener.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await report_progress_listener
+
+    worker.stop()
+
+    if app.state.async_engine is not None:
+        await app.state.async_engine.dispose()
+    app.state.engine.dispose()
+
 
 app = FastAPI(
     lifespan=lifespan,
@@ -42,8 +63,10 @@ if settings.cors_origins:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
+app.include_router(health.router)
 app.include_router(discussions.router)
 app.include_router(messages.router)
 app.include_router(reports.router)
@@ -0,0 +1,72 @@
+"""Initial schema
+
+Databases that were set up by the former `create_db_and_tables` already have these tables,
+so they are only created when missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0001"
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    existing_tables = set() if op.get_context().as_sql else set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "discussion" not in existing_tables:
+        op.create_table(
+            "discussion",
+            sa.Column(
+                "template",
+                postgresql.ENUM(
+                    "BINARY_PROPOSAL",
+                    "PRIORITIZATION_RANKING",
+                    "BRAINSTORMING_IDEATION",
+                    "FEEDBACK_RETROSPECTIVE",
+                    "FORECASTING_PLANNING",
+                    name="category",
+                ),
+                nullable=True,
+            ),
+            sa.Column("name", sa.Text(), nullable=False),
+            sa.Column("description", sa.Text(), nullable=False),
+            sa.Column("tags", sa.ARRAY(sa.Text()), nullable=True),
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("owner_id", sa.Uuid(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.Column("report", sa.JSON(), nullable=True),
+            sa.Column("report_progress", sa.Float(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "message" not in existing_tables:
+        op.create_table(
+            "message",
+            sa.Column("message", sa.Text(), nullable=False),
+            sa.Column("discussion_id", sa.Uuid(), nullable=False),
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("owner_id", sa.Uuid(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["discussion_id"], ["discussion.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("message")
+    op.drop_table("discussion")
+    op.execute("DROP TYPE IF EXISTS category")
@@ -0,0 +1,50 @@
+"""Indexes for discussion listing and message loading
+
+Built concurrently so that existing tables stay writable while the indexes are created.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:30:00
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+
+revision: str = "0002"
+down_revision: str | None = "0001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_discussion_created_at_id",
+            "discussion",
+            ["created_at", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_discussion_owner_id",
+            "discussion",
+            ["owner_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_message_discussion_id_created_at_id",
+            "message",
+            ["discussion_id", "created_at", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_message_discussion_id_created_at_id", "message", postgresql_concurrently=True)
+        op.drop_index("ix_discussion_owner_id", "discussion", postgresql_concurrently=True)
+        op.drop_index("ix_discussion_created_at_id", "discussion", postgresql_concurrently=True)
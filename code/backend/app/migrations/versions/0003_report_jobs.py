@@ -0,0 +1,49 @@
+"""Report job queue
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 13:00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0003"
+down_revision: str | None = "0002"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "reportjob",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("discussion_id", sa.Uuid(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM("QUEUED", "RUNNING", "SUCCEEDED", "FAILED", name="reportjobstatus"),
+            nullable=False,
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("scheduled_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["discussion_id"], ["discussion.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_reportjob_status_scheduled_at", "reportjob", ["status", "scheduled_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reportjob_status_scheduled_at", "reportjob")
+    op.drop_table("reportjob")
+    op.execute("DROP TYPE IF EXISTS reportjobstatus")
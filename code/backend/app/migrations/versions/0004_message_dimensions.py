@@ -0,0 +1,48 @@
+"""Per-message dimension cache
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 15:00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0004"
+down_revision: str | None = "0003"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "messagedimensions",
+        sa.Column("message_id", sa.Uuid(), nullable=False),
+        sa.Column(
+            "category",
+            postgresql.ENUM(
+                "BINARY_PROPOSAL",
+                "PRIORITIZATION_RANKING",
+                "BRAINSTORMING_IDEATION",
+                "FEEDBACK_RETROSPECTIVE",
+                "FORECASTING_PLANNING",
+                name="category",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column("content_hash", sa.String(), nullable=False),
+        sa.Column("dimensions", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["message_id"], ["message.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("message_id", "category"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("messagedimensions")
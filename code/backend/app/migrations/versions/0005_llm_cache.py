@@ -0,0 +1,34 @@
+"""LLM response cache
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+revision: str = "0005"
+down_revision: str | None = "0004"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llmcacheentry",
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("generations", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index("ix_llmcacheentry_created_at", "llmcacheentry", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_llmcacheentry_created_at", "llmcacheentry")
+    op.drop_table("llmcacheentry")
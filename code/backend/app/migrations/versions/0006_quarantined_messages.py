@@ -0,0 +1,29 @@
+"""Quarantine messages whose dimension extraction keeps failing
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 17:00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+revision: str = "0006"
+down_revision: str | None = "0005"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.alter_column("messagedimensions", "dimensions", existing_type=sa.JSON(), nullable=True)
+    op.add_column("messagedimensions", sa.Column("error", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM messagedimensions WHERE dimensions IS NULL")
+    op.drop_column("messagedimensions", "error")
+    op.alter_column("messagedimensions", "dimensions", existing_type=sa.JSON(), nullable=False)
@@ -0,0 +1,82 @@
+"""Versioned reports and report status in their own tables
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 18:00:00
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+revision: str = "0007"
+down_revision: str | None = "0006"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "discussionreport",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("discussion_id", sa.Uuid(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("report", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["discussion_id"], ["discussion.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_discussionreport_discussion_id_version", "discussionreport", ["discussion_id", "version"], unique=True
+    )
+    op.create_table(
+        "discussionreportstatus",
+        sa.Column("discussion_id", sa.Uuid(), nullable=False),
+        sa.Column("report_progress", sa.Float(), nullable=True),
+        sa.Column("report_id", sa.Uuid(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["discussion_id"], ["discussion.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["report_id"], ["discussionreport.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("discussion_id"),
+    )
+
+    # The existing reports become the first versions
+    op.execute(
+        """
+        INSERT INTO discussionreport (id, discussion_id, version, report, created_at)
+        SELECT gen_random_uuid(), id, 1, report, updated_at FROM discussion WHERE report IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO discussionreportstatus (discussion_id, report_progress, report_id, updated_at)
+        SELECT discussion.id, discussion.report_progress, discussionreport.id, discussion.updated_at
+        FROM discussion LEFT JOIN discussionreport ON discussionreport.discussion_id = discussion.id
+        WHERE discussion.report IS NOT NULL OR discussion.report_progress IS NOT NULL
+        """
+    )
+
+    op.drop_column("discussion", "report_progress")
+    op.drop_column("discussion", "report")
+
+
+def downgrade() -> None:
+    op.add_column("discussion", sa.Column("report", sa.JSON(), nullable=True))
+    op.add_column("discussion", sa.Column("report_progress", sa.Float(), nullable=True))
+
+    # Only the current versions survive
+    op.execute(
+        """
+        UPDATE discussion
+        SET report = discussionreport.report, report_progress = discussionreportstatus.report_progress
+        FROM discussionreportstatus LEFT JOIN discussionreport ON discussionreport.id = discussionreportstatus.report_id
+        WHERE discussionreportstatus.discussion_id = discussion.id
+        """
+    )
+
+    op.drop_table("discussionreportstatus")
+    op.drop_index("ix_discussionreport_discussion_id_version", "discussionreport")
+    op.drop_table("discussionreport")
@@ -3,9 +3,9 @@ import uuid
 from datetime import datetime
 from typing import Annotated, Any
 
-from sqlmodel import ARRAY, JSON, Column, Enum, Field, Relationship, SQLModel, Text
+from sqlmodel import ARRAY, JSON, Column, Enum, Field, Index, Relationship, SQLModel, Text
 
-from app.types import Category
+from app.types import Category, ReportJobStatus
 
 
 class DiscussionBase(SQLModel):
@@ -16,15 +16,15 @@ class DiscussionBase(SQLModel):
 
 
 class Discussion(DiscussionBase, table=True):
+    __table_args__ = (Index("ix_discussion_created_at_id", "created_at", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    owner_id: uuid.UUID
+    owner_id: uuid.UUID = Field(index=True)
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
     messages: list["Message"] = Relationship(
         back_populates="discussion", cascade_delete=True, sa_relationship_kwargs={"order_by": "Message.created_at"}
     )
-    report: dict[str, Any] | None = Field(default=None, sa_column=Column(JSON))
-    report_progress: Annotated[float | None, Field(ge=0, le=1)] = None
 
 
 class DiscussionCreate(DiscussionBase):
@@ -40,6 +40,14 @@ class DiscussionPublic(DiscussionBase):
     report_progress: float | None
 
 
+class DiscussionPublicListItem(DiscussionBase):
+    id: uuid.UUID
+    owner_id: uuid.UUID
+    created_at: datetime
+    updated_at: datetime
+    report_progress: float | None
+
+
 class DiscussionPublicWithMessages(DiscussionPublic):
     messages: list["MessagePublicWithoutDiscussionId"]
 
@@ -51,14 +59,6 @@ class DiscussionUpdate(SQLModel):
     tags: set[str] | None = None
 
 
-class DiscussionUpdateWithReport(SQLModel):
-    name: str | None = None
-    description: str | None = None
-    tags: set[str] | None = None
-    report: dict[str, Any] | None = None
-    report_progress: float | None = None
-
-
 class MessageBase(SQLModel):
     message: str = Field(sa_type=Text)
 
@@ -66,6 +66,8 @@ class MessageBase(SQLModel):
 
 
 class Message(MessageBase, table=True):
+    __table_args__ = (Index("ix_message_discussion_id_created_at_id", "discussion_id", "created_at", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     owner_id: uuid.UUID
     created_at: datetime = Field(default_factory=datetime.now)
@@ -84,6 +86,11 @@ class MessagePublic(MessageBase):
     updated_at: datetime
 
 
+class MessagesBulkPublic(SQLModel):
+    count: int
+    ids: list[uuid.UUID]
+
+
 class MessagePublicWithoutDiscussionId(SQLModel):
     id: uuid.UUID
     owner_id: uuid.UUID
@@ -99,3 +106,79 @@ class MessagePublicWithDiscussion(MessagePublicWithoutDiscussionId):
 class MessageUpdate(SQLModel):
     owner_id: uuid.UUID
     message: str | None = None
+
+
+class DiscussionReport(SQLModel, table=True):
+    """One row per generated report of a discussion, the current one is referenced by `DiscussionReportStatus`."""
+
+    __table_args__ = (Index("ix_discussionreport_discussion_id_version", "discussion_id", "version", unique=True),)
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    discussion_id: uuid.UUID = Field(foreign_key="discussion.id", ondelete="CASCADE")
+    version: int
+    # Postgres compresses large values out of line (TOAST), and only reads them when the column is selected
+    report: dict[str, Any] = Field(sa_column=Column(JSON, nullable=False))
+    created_at: datetime = Field(default_factory=datetime.now)
+
+
+class DiscussionReportStatus(SQLModel, table=True):
+    """Small row per discussion with a requested report, rewritten on every progress update instead of the discussion."""
+
+    discussion_id: uuid.UUID = Field(foreign_key="discussion.id", primary_key=True, ondelete="CASCADE")
+    report_progress: Annotated[float | None, Field(ge=0, le=1)] = None
+    # Stays on the previous report while a new one generates
+    report_id: uuid.UUID | None = Field(default=None, foreign_key="discussionreport.id", ondelete="SET NULL")
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+
+class ReportJob(SQLModel, table=True):
+    __table_args__ = (Index("ix_reportjob_status_scheduled_at", "status", "scheduled_at"),)
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    discussion_id: uuid.UUID = Field(foreign_key="discussion.id", ondelete="CASCADE")
+    status: ReportJobStatus = Field(
+        default=ReportJobStatus.QUEUED, sa_column=Column(Enum(ReportJobStatus), nullable=False)
+    )
+    attempts: int = 0
+    error: str | None = Field(default=None, sa_type=Text)
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+    scheduled_at: datetime = Field(default_factory=datetime.now)
+    started_at: datetime | None = None
+    heartbeat_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class MessageDimensions(SQLModel, table=True):
+    message_id: uuid.UUID = Field(foreign_key="message.id", primary_key=True, ondelete="CASCADE")
+    category: Category = Field(sa_column=Column(Enum(Category), primary_key=True))
+    content_hash: str
+    # Without dimensions, the message is quarantined until its content changes
+    dimensions: dict[str, Any] | None = Field(default=None, sa_column=Column(JSON(none_as_null=True)))
+    error: str | None = Field(default=None, sa_type=Text)
+    created_at: datetime = Field(default_factory=datetime.now)
+
+
+class LLMCacheEntry(SQLModel, table=True):
+    key: str = Field(primary_key=True)
+    generations: str = Field(sa_type=Text)
+    created_at: datetime = Field(default_factory=datetime.now, index=True)
+
+
+class PoolStatus(SQLModel):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    timeouts: int
+    wait_seconds_avg: float
+    wait_seconds_max: float
+
+
+class LLMCacheStats(SQLModel):
+    hits: int
+    misses: int
+    writes: int
+    evictions: int
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import logging
+import uuid
+
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import psycopg
+
+from sqlmodel import Session, func, select
+
+from app.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+REPORT_PROGRESS_CHANNEL = "report_progress"
+LISTEN_RECONNECT_DELAY = 5.0
+
+
+def notify_report_progress(session: Session, discussion_id: uuid.UUID, report_progress: float | None) -> None:
+    """Postgres delivers the notification when the session's current transaction commits."""
+    payload = json.dumps({"discussion_id": str(discussion_id), "report_progress": report_progress})
+    session.exec(select(func.pg_notify(REPORT_PROGRESS_CHANNEL, payload)))
+
+
+class ReportProgressBroker:
+    """
+    Fans out report progress notifications to the open report event streams,
+    sharing a single LISTEN connection per process.
+    """
+
+    def __init__(self) -> None:
+        self.subscribers: defaultdict[uuid.UUID, set[asyncio.Queue[float | None]]] = defaultdict(set)
+
+    async def listen(self) -> None:
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    settings.database_conninfo, autocommit=True
+                ) as connection:
+                    await connection.execute(f"LISTEN {REPORT_PROGRESS_CHANNEL}")
+                    async for notify in connection.notifies():
+                        self.publish(notify.payload)
+            except psycopg.Error:
+                logger.exception("Lost report progress listener connection, reconnecting")
+                await asyncio.sleep(LISTEN_RECONNECT_DELAY)
+
+    def publish(self, payload: str) -> None:
+        data = json.loads(payload)
+        for queue in self.subscribers.get(uuid.UUID(data["discussion_id"]), ()):
+            queue.put_nowait(data["report_progress"])
+
+    @contextmanager
+    def subscribe(self, discussion_id: uuid.UUID) -> Iterator[asyncio.Queue[float | None]]:
+        queue: asyncio.Queue[float | None] = asyncio.Queue()
+        self.subscribers[discussion_id].add(queue)
+        try:
+            yield queue
+        finally:
+            self.subscribers[discussion_id].discard(queue)
+            if not self.subscribers[discussion_id]:
+                del self.subscribers[discussion_id]
@@ -0,0 +1,47 @@
+import base64
+import binascii
+import uuid
+
+from datetime import datetime
+from typing import Protocol
+
+from fastapi import Response, status
+from fastapi.exceptions import HTTPException
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class KeysetRow(Protocol):
+    id: uuid.UUID
+    created_at: datetime
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        ) from e
+
+
+def paginate[T: KeysetRow](rows: list[T], limit: int, response: Response) -> list[T]:
+    """
+    Trim a page that was fetched with `limit + 1` rows.
+    If there is a further page, its cursor is sent in the `X-Next-Cursor` header, keeping the body a plain list.
+    """
+    if len(rows) <= limit:
+        return rows
+
+    rows = rows[:limit]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows
@@ -0,0 +1,98 @@
+import threading
+import time
+
+from typing import Any
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection, QueuePool
+
+from app.models import PoolStatus
+from app.settings import settings
+
+
+class PoolMetrics:
+    """
+    Cumulative checkout statistics of a connection pool.
+    Wait time covers everything between asking the pool for a connection and getting one,
+    i.e. queueing behind other checkouts as well as opening new connections.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_checkout(self, wait_seconds: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+
+class InstrumentedPoolMixin:
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()  # type: ignore[misc]
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.metrics.record_checkout(time.perf_counter() - start, timed_out)
+
+    def recreate(self) -> Any:
+        # Engine.dispose() swaps in a fresh pool; keep counting into the same metrics
+        pool = super().recreate()  # type: ignore[misc]
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_pool_options() -> dict[str, Any]:
+    return {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+        "pool_recycle": settings.database_pool_recycle,
+    }
+
+
+def get_pool_status(engine: Engine | AsyncEngine) -> PoolStatus:
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedPoolMixin) or not isinstance(pool, QueuePool):
+        raise TypeError(f"Engine does not use an instrumented queue pool: {type(pool).__name__}")
+
+    metrics = pool.metrics
+    attempts = metrics.checkouts + metrics.timeouts
+
+    return PoolStatus(
+        size=pool.size(),
+        checked_out=pool.checkedout(),
+        idle=pool.checkedin(),
+        overflow=max(0, pool.overflow()),
+        max_overflow=settings.database_max_overflow,
+        checkouts=metrics.checkouts,
+        timeouts=metrics.timeouts,
+        wait_seconds_avg=metrics.wait_seconds_total / attempts if attempts else 0.0,
+        wait_seconds_max=metrics.wait_seconds_max,
+    )
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+from email.utils import parsedate_to_datetime
+
+import openai
+
+
+# Azure enforces per-minute quotas over short windows, so only a fraction of a minute's budget may be sent at once
+BURST_WINDOW_SECONDS = 10.0
+
+
+class TokenBucket:
+    """
+    Refills continuously at `per_minute / 60` per second.
+    Reservations may overdraw the bucket, the caller then waits until the deficit is refilled.
+    """
+
+    def __init__(self, per_minute: int) -> None:
+        self.rate = per_minute / 60
+        self.capacity = self.rate * BURST_WINDOW_SECONDS
+        self.level = self.capacity
+        self.updated_at = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+
+class RateLimiter:
+    """
+    Keeps LLM calls within a requests-per-minute and a tokens-per-minute budget,
+    and pauses all callers when the API answers with a `Retry-After`.
+    Thread-safe, so that one instance can be shared by all report jobs of a process.
+    """
+
+    def __init__(self, requests_per_minute: int | None = None, tokens_per_minute: int | None = None) -> None:
+        self._lock = threading.Lock()
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.paused_until = 0.0
+
+    def reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self.paused_until - now)
+            if self.requests is not None:
+                delay = max(delay, self.requests.reserve(1, now))
+            if self.tokens is not None:
+                delay = max(delay, self.tokens.reserve(tokens, now))
+            return delay
+
+    async def acquire(self, tokens: int) -> None:
+        await asyncio.sleep(self.reserve(tokens))
+
+    def record_usage(self, estimated_tokens: int, used_tokens: int) -> None:
+        """Corrects a reservation once the actual token usage is known."""
+        with self._lock:
+            if self.tokens is not None:
+                self.tokens.level -= used_tokens - estimated_tokens
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def get_retry_after(error: openai.APIStatusError) -> float | None:
+    headers = error.response.headers
+
+    if (retry_after_ms := headers.get("retry-after-ms")) is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    if (retry_after := headers.get("retry-after")) is not None:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+
+    return None
@@ -0,0 +1,46 @@
+import uuid
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlmodel import Session, col, func, select
+from sqlmodel.sql.expression import Select
+
+from app.models import DiscussionReport, DiscussionReportStatus
+
+
+def upsert_report_status(discussion_id: uuid.UUID, **values: Any) -> Insert:
+    """
+    Creates or updates the status row of the discussion with the given columns, e.g. `report_progress`.
+    A statement, so that sync and async sessions can execute it alike.
+    """
+    values["updated_at"] = datetime.now()
+    statement = insert(DiscussionReportStatus).values(discussion_id=discussion_id, **values)
+    return statement.on_conflict_do_update(index_elements=[col(DiscussionReportStatus.discussion_id)], set_=values)
+
+
+def select_current_report(discussion_id: uuid.UUID) -> Select[tuple[float | None, dict[str, Any]]]:
+    """
+    The report progress and current report of the discussion, the report being `None` until the first one is done.
+    No row if no report was ever requested.
+    """
+    return (
+        select(col(DiscussionReportStatus.report_progress), col(DiscussionReport.report))
+        .outerjoin(DiscussionReport, col(DiscussionReport.id) == col(DiscussionReportStatus.report_id))
+        .where(col(DiscussionReportStatus.discussion_id) == discussion_id)
+    )
+
+
+def store_report(session: Session, discussion_id: uuid.UUID, report: dict[str, Any]) -> DiscussionReport:
+    """Adds the report as the next version of the discussion and makes it the current one, with the next commit."""
+    statement = select(func.coalesce(func.max(DiscussionReport.version), 0)).where(
+        col(DiscussionReport.discussion_id) == discussion_id
+    )
+    db_report = DiscussionReport(discussion_id=discussion_id, version=session.exec(statement).one() + 1, report=report)
+    session.add(db_report)
+    # The status row references the report
+    session.flush()
+
+    session.exec(upsert_report_status(discussion_id, report_progress=1, report_id=db_report.id))
+    return db_report
@@ -1,19 +1,30 @@
 import uuid
 
 from datetime import datetime
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from fastapi.exceptions import HTTPException
-from sqlmodel import Session, select
+from sqlalchemy import any_, tuple_
+from sqlmodel import col, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
 
 from app.database import get_session
 from app.models import (
     Discussion,
     DiscussionCreate,
     DiscussionPublic,
+    DiscussionPublicListItem,
     DiscussionPublicWithMessages,
+    DiscussionReportStatus,
     DiscussionUpdate,
+    Message,
+    MessagePublicWithoutDiscussionId,
 )
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, paginate
+from app.report_store import select_current_report
+from app.types import Category
 
 
 router = APIRouter(
@@ -21,36 +32,127 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=list[DiscussionPublic])
-def read_discussions(session: Session = Depends(get_session)) -> list[Discussion]:
-    statement = select(Discussion)
-    return list(session.exec(statement).all())
+@router.get("/", response_model=list[DiscussionPublicListItem])
+async def read_discussions(
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    owner_id: uuid.UUID | None = None,
+    template: Category | None = None,
+    tag: str | None = None,
+    session: AsyncSession = Depends(get_session),
+) -> list[DiscussionPublicListItem]:
+    statement = (
+        select(Discussion, DiscussionReportStatus.report_progress)
+        .outerjoin(DiscussionReportStatus, col(DiscussionReportStatus.discussion_id) == col(Discussion.id))
+        .order_by(col(Discussion.created_at).desc(), col(Discussion.id).desc())
+        .limit(limit + 1)
+    )
+
+    if cursor is not None:
+        created_at, discussion_id = decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(col(Discussion.created_at), col(Discussion.id)) < (created_at, discussion_id)
+        )
+    if owner_id is not None:
+        statement = statement.where(col(Discussion.owner_id) == owner_id)
+    if template is not None:
+        statement = statement.where(col(Discussion.template) == template)
+    if tag is not None:
+        statement = statement.where(any_(col(Discussion.tags)) == tag)
+
+    discussions = [
+        DiscussionPublicListItem.model_validate(db_discussion, update={"report_progress": report_progress})
+        for db_discussion, report_progress in (await session.exec(statement)).all()
+    ]
+    return paginate(discussions, limit, response)
+
+
+async def read_report_fields(session: AsyncSession, discussion_id: uuid.UUID) -> dict[str, Any]:
+    """The `report` and `report_progress` of the public discussion models, from the report tables."""
+    row = (await session.exec(select_current_report(discussion_id))).first()
+    report_progress, report = (None, None) if row is None else row
+    return {"report": report, "report_progress": report_progress}
 
 
 @router.post("/", response_model=DiscussionPublic)
-def create_discussion(discussion: DiscussionCreate, session: Session = Depends(get_session)) -> Discussion:
+async def create_discussion(
+    discussion: DiscussionCreate, session: AsyncSession = Depends(get_session)
+) -> DiscussionPublic:
     db_discussion = Discussion.model_validate(discussion)
     session.add(db_discussion)
-    session.commit()
-    session.refresh(db_discussion)
-    return db_discussion
+    await session.commit()
+    await session.refresh(db_discussion)
+    return DiscussionPublic.model_validate(db_discussion, update={"report": None, "report_progress": None})
+
+
+def select_messages_page(discussion_id: uuid.UUID, limit: int, cursor: str | None) -> SelectOfScalar[Message]:
+    statement = (
+        select(Message)
+        .where(col(Message.discussion_id) == discussion_id)
+        .order_by(col(Message.created_at), col(Message.id))
+        .limit(limit + 1)
+    )
+
+    if cursor is not None:
+        created_at, message_id = decode_cursor(cursor)
+        statement = statement.where(tuple_(col(Message.created_at), col(Message.id)) > (created_at, message_id))
+
+    return statement
 
 
 @router.get("/{discussion_id}", response_model=DiscussionPublicWithMessages)
-def read_discussion(discussion_id: uuid.UUID, session: Session = Depends(get_session)) -> Discussion:
-    db_discussion = session.get(Discussion, discussion_id)
+async def read_discussion(
+    discussion_id: uuid.UUID,
+    response: Response,
+    messages_limit: Annotated[int | None, Query(ge=0)] = None,
+    session: AsyncSession = Depends(get_session),
+) -> DiscussionPublicWithMessages:
+    db_discussion = await session.get(Discussion, discussion_id)
+    if not db_discussion:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Discussion not found",
+        )
+
+    if messages_limit is None:
+        statement = select(Message).where(col(Message.discussion_id) == discussion_id).order_by(col(Message.created_at))
+        db_messages = list((await session.exec(statement)).all())
+    elif messages_limit == 0:
+        db_messages = []
+    else:
+        statement = select_messages_page(discussion_id, messages_limit, None)
+        db_messages = paginate(list((await session.exec(statement)).all()), messages_limit, response)
+
+    return DiscussionPublicWithMessages.model_validate(
+        db_discussion, update={"messages": db_messages, **await read_report_fields(session, discussion_id)}
+    )
+
+
+@router.get("/{discussion_id}/messages", response_model=list[MessagePublicWithoutDiscussionId])
+async def read_discussion_messages(
+    discussion_id: uuid.UUID,
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    session: AsyncSession = Depends(get_session),
+) -> list[Message]:
+    db_discussion = await session.get(Discussion, discussion_id)
     if not db_discussion:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Discussion not found",
         )
 
-    return db_discussion
+    statement = select_messages_page(discussion_id, limit, cursor)
+    return paginate(list((await session.exec(statement)).all()), limit, response)
 
 
 @router.delete("/{discussion_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_discussion(discussion_id: uuid.UUID, owner_id: uuid.UUID, session: Session = Depends(get_session)) -> None:
-    db_discussion = session.get(Discussion, discussion_id)
+async def remove_discussion(
+    discussion_id: uuid.UUID, owner_id: uuid.UUID, session: AsyncSession = Depends(get_session)
+) -> None:
+    db_discussion = await session.get(Discussion, discussion_id)
     if not db_discussion:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -63,15 +165,17 @@ def remove_discussion(discussion_id: uuid.UUID, owner_id: uuid.UUID, session: Se
             detail="Not allowed to delete this discussion",
         )
 
-    session.delete(db_discussion)
-    session.commit()
+    # Bulk deletes instead of the ORM cascade, which would have to load every message first
+    await session.exec(delete(Message).where(col(Message.discussion_id) == discussion_id))
+    await session.exec(delete(Discussion).where(col(Discussion.id) == discussion_id))
+    await session.commit()
 
 
 @router.patch("/{discussion_id}", response_model=DiscussionPublic)
-def update_discussion(
-    discussion_id: uuid.UUID, discussion: DiscussionUpdate, session: Session = Depends(get_session)
-) -> Discussion:
-    db_discussion = session.get(Discussion, discussion_id)
+async def update_discussion(
+    discussion_id: uuid.UUID, discussion: DiscussionUpdate, session: AsyncSession = Depends(get_session)
+) -> DiscussionPublic:
+    db_discussion = await session.get(Discussion, discussion_id)
     if not db_discussion:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -87,6 +191,6 @@ def update_discussion(
     discussion_data = discussion.model_dump(exclude={"owner_id"}, exclude_unset=True)
     db_discussion.sqlmodel_update(discussion_data, update={"updated_at": datetime.now()})
     session.add(db_discussion)
-    session.commit()
-    session.refresh(db_discussion)
-    return db_discussion
+    await session.commit()
+    await session.refresh(db_discussion)
+    return DiscussionPublic.model_validate(db_discussion, update=await read_report_fields(session, discussion_id))
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Request
+
+from app.models import PoolStatus
+from app.pool import get_pool_status
+
+
+router = APIRouter(
+    prefix="/health",
+)
+
+
+@router.get("/")
+async def read_health() -> dict[str, str]:
+    return {"status": "ok"}
+
+
+@router.get("/pool", response_model=dict[str, PoolStatus])
+async def read_pool_status(request: Request) -> dict[str, PoolStatus]:
+    pools = {"sync": get_pool_status(request.app.state.engine)}
+    if request.app.state.async_engine is not None:
+        pools["async"] = get_pool_status(request.app.state.async_engine)
+
+    return pools
@@ -1,10 +1,14 @@
 import uuid
 
-from datetime import datetime
+from collections.abc import AsyncGenerator
+from datetime import datetime, timedelta
+from typing import NoReturn
 
-from fastapi import APIRouter, Depends, status
-from fastapi.exceptions import HTTPException
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.exceptions import HTTPException, RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from sqlmodel import col, insert, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.database import get_session
 from app.models import (
@@ -12,6 +16,7 @@ from app.models import (
     Message,
     MessageCreate,
     MessagePublic,
+    MessagesBulkPublic,
     MessageUpdate,
 )
 
@@ -20,10 +25,88 @@ router = APIRouter(
     prefix="/messages",
 )
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+BULK_INSERT_CHUNK_SIZE = 1000
+MESSAGE_CREATE_LIST_ADAPTER = TypeAdapter(list[MessageCreate])
+
+
+def raise_validation_error(e: ValidationError, *loc: int) -> NoReturn:
+    raise RequestValidationError(
+        [{**error, "loc": ("body", *loc, *error["loc"])} for error in e.errors(include_url=False)]
+    ) from e
+
+
+def parse_ndjson_line(line: bytes, index: int) -> MessageCreate:
+    try:
+        return MessageCreate.model_validate_json(line)
+    except ValidationError as e:
+        raise_validation_error(e, index)
+
+
+async def iter_bulk_messages(request: Request) -> AsyncGenerator[MessageCreate, None]:
+    """
+    Yields the messages of a bulk request, either from a JSON array or from an NDJSON stream.
+    NDJSON is validated line by line while the body is still arriving.
+    """
+    if not request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        try:
+            messages = MESSAGE_CREATE_LIST_ADAPTER.validate_json(await request.body())
+        except ValidationError as e:
+            raise_validation_error(e)
+
+        for message in messages:
+            yield message
+        return
+
+    index = 0
+    buffer = b""
+    async for chunk in request.stream():
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield parse_ndjson_line(line, index)
+                index += 1
+
+    if buffer.strip():
+        yield parse_ndjson_line(buffer, index)
+
+
+async def insert_messages(
+    session: AsyncSession, messages: list[MessageCreate], known_discussion_ids: set[uuid.UUID]
+) -> list[uuid.UUID]:
+    discussion_ids = {message.discussion_id for message in messages} - known_discussion_ids
+    if discussion_ids:
+        statement = select(Discussion.id).where(col(Discussion.id).in_(discussion_ids))
+        found_discussion_ids = set((await session.exec(statement)).all())
+        if found_discussion_ids != discussion_ids:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Discussion not found",
+            )
+        known_discussion_ids |= found_discussion_ids
+
+    # Spread timestamps by a microsecond so the import order survives ordering by (created_at, id)
+    now = datetime.now()
+    ids = [uuid.uuid4() for _ in messages]
+    rows = [
+        {
+            "id": message_id,
+            "message": message.message,
+            "discussion_id": message.discussion_id,
+            "owner_id": message.owner_id,
+            "created_at": now + timedelta(microseconds=i),
+            "updated_at": now + timedelta(microseconds=i),
+        }
+        for i, (message_id, message) in enumerate(zip(ids, messages, strict=True))
+    ]
+    await session.exec(insert(Message), params=rows)
+
+    return ids
+
 
 @router.post("/", response_model=MessagePublic)
-def create_message(message: MessageCreate, session: Session = Depends(get_session)) -> Message:
-    db_discussion = session.get(Discussion, message.discussion_id)
+async def create_message(message: MessageCreate, session: AsyncSession = Depends(get_session)) -> Message:
+    db_discussion = await session.get(Discussion, message.discussion_id)
     if not db_discussion:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -32,14 +115,51 @@ def create_message(message: MessageCreate, session: Session = Depends(get_sessio
 
     db_message = Message.model_validate(message)
     session.add(db_message)
-    session.commit()
-    session.refresh(db_message)
+    await session.commit()
+    await session.refresh(db_message)
     return db_message
 
 
+@router.post(
+    "/bulk",
+    response_model=MessagesBulkPublic,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/MessageCreate"}},
+                },
+                NDJSON_MEDIA_TYPE: {
+                    "schema": {"$ref": "#/components/schemas/MessageCreate"},
+                },
+            },
+        },
+    },
+)
+async def create_messages_bulk(request: Request, session: AsyncSession = Depends(get_session)) -> MessagesBulkPublic:
+    ids: list[uuid.UUID] = []
+    known_discussion_ids: set[uuid.UUID] = set()
+
+    chunk: list[MessageCreate] = []
+    async for message in iter_bulk_messages(request):
+        chunk.append(message)
+        if len(chunk) >= BULK_INSERT_CHUNK_SIZE:
+            ids += await insert_messages(session, chunk, known_discussion_ids)
+            chunk = []
+
+    if chunk:
+        ids += await insert_messages(session, chunk, known_discussion_ids)
+
+    await session.commit()
+    return MessagesBulkPublic(count=len(ids), ids=ids)
+
+
 @router.delete("/{message_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_message(message_id: uuid.UUID, owner_id: uuid.UUID, session: Session = Depends(get_session)) -> None:
-    db_message = session.get(Message, message_id)
+async def remove_message(
+    message_id: uuid.UUID, owner_id: uuid.UUID, session: AsyncSession = Depends(get_session)
+) -> None:
+    db_message = await session.get(Message, message_id)
     if not db_message:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -52,13 +172,15 @@ def remove_message(message_id: uuid.UUID, owner_id: uuid.UUID, session: Session
             detail="Not allowed to delete this message",
         )
 
-    session.delete(db_message)
-    session.commit()
+    await session.delete(db_message)
+    await session.commit()
 
 
 @router.patch("/{discussion_id}", response_model=MessagePublic)
-def update_message(message_id: uuid.UUID, message: MessageUpdate, session: Session = Depends(get_session)) -> Message:
-    db_message = session.get(Message, message_id)
+async def update_message(
+    message_id: uuid.UUID, message: MessageUpdate, session: AsyncSession = Depends(get_session)
+) -> Message:
+    db_message = await session.get(Message, message_id)
     if not db_message:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -74,6 +196,6 @@ def update_message(message_id: uuid.UUID, message: MessageUpdate, session: Sessi
     message_data = message.model_dump(exclude={"owner_id"}, exclude_unset=True)
     db_message.sqlmodel_update(message_data, update={"updated_at": datetime.now()})
     session.add(db_message)
-    session.commit()
-    session.refresh(db_message)
+    await session.commit()
+    await session.refresh(db_message)
     return db_message
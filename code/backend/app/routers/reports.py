@@ -1,25 +1,26 @@
+import asyncio
+import json
 import uuid
 
-from datetime import datetime
-from typing import cast
+from collections.abc import AsyncIterator, Mapping
+from typing import Any
 
-import pandas as pd
-
-from fastapi import APIRouter, BackgroundTasks, Depends, Request, status
+from fastapi import APIRouter, Depends, FastAPI, Request, status
 from fastapi.exceptions import HTTPException
-from langchain_core.runnables import RunnableConfig
-from sqlalchemy.engine import Connection, Engine
-from sqlmodel import Session
-
-from app.consensus.category_selection import CategorySelectionGraphState, category_selection_graph
-from app.consensus.dimension_extraction import DimensionExtractionGraphState, dimension_extraction_graph
-from app.consensus.summary import SummaryGraphState, summary_graph
-from app.consensus.summary_helpers import df_to_native_records
-from app.database import get_session
-from app.llm import llm
-from app.models import Discussion, DiscussionUpdateWithReport
+from fastapi.responses import StreamingResponse
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_session, open_session
+from app.models import Discussion, DiscussionReportStatus, ReportJob
+from app.notifications import ReportProgressBroker
+from app.report_store import select_current_report, upsert_report_status
 from app.settings import settings
-from app.types import Category, Dimensions
+
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+# Also bounds how long a notification lost during a listener reconnect goes unnoticed
+REPORT_EVENTS_KEEPALIVE_INTERVAL = 15.0
 
 
 router = APIRouter(
@@ -27,87 +28,24 @@ router = APIRouter(
 )
 
 
-def generate_consensus_report(discussion_id: uuid.UUID, engine: Engine | Connection) -> None:
-    with Session(engine) as session:
-        db_discussion = cast(Discussion, session.get(Discussion, discussion_id))
-
-        category_selection_graph_state = category_selection_graph.invoke(
-            CategorySelectionGraphState(discussion=db_discussion),
-            config=RunnableConfig(configurable={"llm": llm}),
-        )
-
-        category: Category = Category(category_selection_graph_state["category"])
-
-        discussion = DiscussionUpdateWithReport(report_progress=0.1)
-
-        discussion_data = discussion.model_dump(exclude_unset=True)
-        db_discussion.sqlmodel_update(discussion_data)
-        session.add(db_discussion)
-        session.commit()
-        session.refresh(db_discussion)
-
-        dimension_extraction_graph_state = dimension_extraction_graph.invoke(
-            DimensionExtractionGraphState(discussion=db_discussion, category=category),
-            config=RunnableConfig(configurable={"llm": llm}),
-        )
-
-        dimensions: list[Dimensions] = dimension_extraction_graph_state["dimensions"]
-
-        discussion = DiscussionUpdateWithReport(report_progress=0.5)
-
-        discussion_data = discussion.model_dump(exclude_unset=True)
-        db_discussion.sqlmodel_update(discussion_data)
-        session.add(db_discussion)
-        session.commit()
-        session.refresh(db_discussion)
-
-        summary_graph_state = summary_graph.invoke(
-            SummaryGraphState(
-                discussion=db_discussion,
-                category=category,
-                dimensions=dimensions,
-            ),
-            config=RunnableConfig(configurable={"llm": llm}),
-        )
-
-        theme_board = cast(pd.DataFrame, summary_graph_state["theme_board"])
-        sentiment_table = cast(pd.DataFrame, summary_graph_state["sentiment_table"])
-        emotion_table = cast(pd.DataFrame, summary_graph_state["emotion_table"])
-        payload = cast(dict, summary_graph_state["payload"])
-        summary = cast(str, summary_graph_state["summary"])
-
-        report = {
-            "theme_board": df_to_native_records(theme_board),
-            "sentiment_table": df_to_native_records(sentiment_table),
-            "emotion_table": df_to_native_records(emotion_table),
-            "payload": payload,
-            "summary": summary,
-        }
-
-        discussion = DiscussionUpdateWithReport(report=report, report_progress=1)
-
-        discussion_data = discussion.model_dump(exclude_unset=True)
-        db_discussion.sqlmodel_update(discussion_data)
-        session.add(db_discussion)
-        session.commit()
-        session.refresh(db_discussion)
-
-
 @router.post("/{discussion_id}", status_code=status.HTTP_204_NO_CONTENT)
-def start_consensus_report_generation(
-    request: Request,
+async def start_consensus_report_generation(
     discussion_id: uuid.UUID,
     owner_id: uuid.UUID,
-    background_tasks: BackgroundTasks,
-    session: Session = Depends(get_session),
+    regenerate: bool = False,
+    session: AsyncSession = Depends(get_session),
 ) -> None:
+    """
+    With `regenerate`, an existing report is rebuilt and stays readable meanwhile.
+    Dimensions are only extracted again for messages that were added or edited since.
+    """
     if settings.read_only_mode:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot create consensus report when read-only mode is enabled",
         )
 
-    db_discussion = session.get(Discussion, discussion_id)
+    db_discussion = await session.get(Discussion, discussion_id)
     if not db_discussion:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -120,20 +58,92 @@ def start_consensus_report_generation(
             detail="Not allowed to create consensus report",
         )
 
-    if db_discussion.report is not None or db_discussion.report_progress is not None:
+    db_status = await session.get(DiscussionReportStatus, discussion_id)
+    if db_status is not None and db_status.report_progress is not None and db_status.report_progress < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Consensus report is already generating",
+        )
+
+    if db_status is not None and db_status.report_id is not None and not regenerate:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Consensus report is already generating"
-            if db_discussion.report is None
-            else "Consensus report already generated",
+            detail="Consensus report already generated",
+        )
+
+    await session.exec(upsert_report_status(discussion_id, report_progress=0))
+    # Picked up by `python -m app.worker`, see `app.jobs`
+    session.add(ReportJob(discussion_id=discussion_id))
+    await session.commit()
+
+
+async def read_report_state(app: FastAPI, discussion_id: uuid.UUID) -> tuple[bool, float | None]:
+    # Short-lived session, a long-lived stream must not hold on to a pooled connection
+    async with open_session(app) as session:
+        statement = (
+            select(Discussion.id, DiscussionReportStatus.report_progress)
+            .outerjoin(DiscussionReportStatus, col(DiscussionReportStatus.discussion_id) == col(Discussion.id))
+            .where(col(Discussion.id) == discussion_id)
         )
+        row = (await session.exec(statement)).first()
+
+    if row is None:
+        return False, None
+    return True, row[1]
+
+
+async def read_report(app: FastAPI, discussion_id: uuid.UUID) -> Mapping[str, Any] | None:
+    async with open_session(app) as session:
+        row = (await session.exec(select_current_report(discussion_id))).first()
+
+    return None if row is None else row[1]
+
+
+def format_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-    discussion = DiscussionUpdateWithReport(report_progress=0)
 
-    discussion_data = discussion.model_dump(exclude_unset=True)
-    db_discussion.sqlmodel_update(discussion_data, update={"updated_at": datetime.now()})
-    session.add(db_discussion)
-    session.commit()
-    session.refresh(db_discussion)
+async def iter_report_events(app: FastAPI, discussion_id: uuid.UUID) -> AsyncIterator[str]:
+    broker: ReportProgressBroker = app.state.report_progress_broker
+
+    # Subscribe before reading the current state so that no update falls in between
+    with broker.subscribe(discussion_id) as queue:
+        _, report_progress = await read_report_state(app, discussion_id)
+
+        while True:
+            yield format_event("progress", {"report_progress": report_progress})
+            if report_progress is None or report_progress >= 1:
+                break
+
+            try:
+                next_report_progress = await asyncio.wait_for(queue.get(), REPORT_EVENTS_KEEPALIVE_INTERVAL)
+            except TimeoutError:
+                _, next_report_progress = await read_report_state(app, discussion_id)
+                if next_report_progress == report_progress:
+                    yield ": keepalive\n\n"
+                    continue
+
+            report_progress = next_report_progress
+
+    if report_progress is not None:
+        yield format_event("report", await read_report(app, discussion_id))
+
+
+@router.get("/{discussion_id}/events", response_class=StreamingResponse)
+async def stream_consensus_report_events(request: Request, discussion_id: uuid.UUID) -> StreamingResponse:
+    """
+    Streams `progress` events until the report is done, followed by a single `report` event.
+    A `null` progress means that no report is generating, e.g. because the generation failed.
+    """
+    exists, _ = await read_report_state(request.app, discussion_id)
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Discussion not found",
+        )
 
-    background_tasks.add_task(generate_consensus_report, discussion_id, request.app.state.engine)
+    return StreamingResponse(
+        iter_report_events(request.app, discussion_id),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -3,6 +3,9 @@ from typing import Literal
 
 from pydantic import AnyHttpUrl, SecretStr, field_validator
 from pydantic_settings import BaseSettings
+from sqlalchemy.engine import make_url
+
+from app.types import ExtractionFailurePolicy, ThemeSimilarity
 
 
 class Settings(BaseSettings):
@@ -19,11 +22,49 @@ class Settings(BaseSettings):
     database_name: str
     database_user: str
     database_password: SecretStr
+    database_async: bool = True
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30.0
+    database_pool_pre_ping: bool = False
+    database_pool_recycle: int = -1
+
+    report_worker_concurrency: int = 2
+    report_worker_embedded: bool = False
+    report_worker_poll_interval: float = 2.0
+    report_worker_heartbeat_interval: float = 30.0
+    report_job_stale_after: float = 300.0
+    report_job_max_attempts: int = 3
+    report_job_retry_delay: float = 60.0
 
     azure_openai_endpoint: str
     azure_openai_api_key: SecretStr
     azure_openai_api_version: str = "2025-04-01-preview"
     azure_openai_model: str = "gpt-4o"
+    azure_openai_requests_per_minute: int | None = None
+    azure_openai_tokens_per_minute: int | None = None
+
+    llm_cache_enabled: bool = True
+    llm_cache_database_url: str | None = None
+    llm_cache_ttl: float = 7 * 24 * 60 * 60
+    llm_cache_max_entries: int = 100_000
+
+    dimension_extraction_concurrency: int = 8
+    dimension_extraction_batch_size: int = 1
+    dimension_extraction_max_attempts: int = 5
+    dimension_extraction_timeout: float = 120.0
+    dimension_extraction_failure_policy: ExtractionFailurePolicy = ExtractionFailurePolicy.QUARANTINE
+
+    theme_similarity: ThemeSimilarity = ThemeSimilarity.STRING
+
+    @property
+    def database_url(self) -> str:
+        return f"postgresql+psycopg://{self.database_user}:{self.database_password.get_secret_value()}@{self.database_host}:{self.database_port}/{self.database_name}"
+
+    @property
+    def database_conninfo(self) -> str:
+        """`database_url` for plain psycopg connections."""
+        return make_url(self.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
 
     @field_validator("cors_origins", mode="before")
     def assemble_cors_origins(cls, v: str | list[str]) -> list[str]:
@@ -11,6 +11,24 @@ class Category(str, Enum):
     FORECASTING_PLANNING = "FORECASTING_PLANNING"
 
 
+class ReportJobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+
+class ExtractionFailurePolicy(str, Enum):
+    FAIL = "FAIL"
+    DROP = "DROP"
+    QUARANTINE = "QUARANTINE"
+
+
+class ThemeSimilarity(str, Enum):
+    STRING = "STRING"
+    TFIDF = "TFIDF"
+
+
 class Sentiment(str, Enum):
     POSITIVE = "POSITIVE"
     NEUTRAL = "NEUTRAL"
@@ -0,0 +1,147 @@
+import logging
+import signal
+import threading
+import time
+import uuid
+
+from types import FrameType
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.consensus.report import generate_consensus_report
+from app.consensus.summary import enable_copy_on_write
+from app.database import create_database_engine
+from app.jobs import claim_report_job, finish_report_job, touch_report_jobs
+from app.llm import get_llm_cache
+from app.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class ReportWorker:
+    """
+    Runs queued report jobs on `concurrency` threads, next to one thread that keeps the heartbeats
+    of the running jobs fresh so that other workers do not take them over.
+    """
+
+    def __init__(self, engine: Engine, concurrency: int) -> None:
+        self.engine = engine
+        self.concurrency = concurrency
+        self.stop_event = threading.Event()
+        self.running_job_ids: set[uuid.UUID] = set()
+        self.running_job_ids_lock = threading.Lock()
+        self.work_threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        self.work_threads = [
+            threading.Thread(target=self.work, name=f"report-worker-{i}", daemon=True) for i in range(self.concurrency)
+        ]
+        for thread in self.work_threads:
+            thread.start()
+
+        threading.Thread(target=self.send_heartbeats, name="report-worker-heartbeat", daemon=True).start()
+
+        logger.info("Report worker started with %d threads", self.concurrency)
+
+    def stop(self) -> None:
+        """Lets the threads exit after their current job; use `join` to wait for them."""
+        self.stop_event.set()
+
+    def join(self) -> None:
+        for thread in self.work_threads:
+            thread.join()
+
+    def work(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                with Session(self.engine) as session:
+                    db_job = claim_report_job(session)
+            except Exception:
+                logger.exception("Failed to claim report job")
+                db_job = None
+
+            if db_job is None:
+                self.stop_event.wait(settings.report_worker_poll_interval)
+                continue
+
+            self.run_job(db_job.id, db_job.discussion_id, db_job.attempts)
+
+    def run_job(self, job_id: uuid.UUID, discussion_id: uuid.UUID, attempts: int) -> None:
+        with self.running_job_ids_lock:
+            self.running_job_ids.add(job_id)
+
+        error: str | None = None
+        try:
+            if attempts > settings.report_job_max_attempts:
+                # Only reachable through stale heartbeats, i.e. the job keeps taking its worker down
+                error = f"Abandoned after {attempts - 1} attempts without a heartbeat"
+            else:
+                logger.info("Generating consensus report for discussion %s (attempt %d)", discussion_id, attempts)
+                # Later attempts continue from the checkpoints of the interrupted ones
+                generate_consensus_report(discussion_id, self.engine, resume=attempts > 1)
+        except Exception as e:
+            logger.exception("Consensus report for discussion %s failed", discussion_id)
+            error = repr(e)
+        finally:
+            with self.running_job_ids_lock:
+                self.running_job_ids.discard(job_id)
+
+        try:
+            with Session(self.engine) as session:
+                finish_report_job(session, job_id, error)
+        except Exception:
+            logger.exception("Failed to finish report job %s, it will be retried once its heartbeat is stale", job_id)
+
+        if (llm_cache := get_llm_cache()) is not None:
+            stats = llm_cache.stats()
+            logger.info(
+                "LLM cache totals: %d hits, %d misses, %d writes, %d evictions",
+                stats.hits,
+                stats.misses,
+                stats.writes,
+                stats.evictions,
+            )
+
+    def send_heartbeats(self) -> None:
+        # Keeps running after `stop` until the last job has finished
+        while any(thread.is_alive() for thread in self.work_threads):
+            time.sleep(settings.report_worker_heartbeat_interval)
+
+            with self.running_job_ids_lock:
+                job_ids = list(self.running_job_ids)
+
+            if not job_ids:
+                continue
+
+            try:
+                with Session(self.engine) as session:
+                    touch_report_jobs(session, job_ids)
+            except Exception:
+                logger.exception("Failed to send report job heartbeats")
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(threadName)s] %(message)s")
+    # pandas options are global, so only the standalone worker sets it, once before its job threads start;
+    # a worker embedded in the API keeps the API's options
+    enable_copy_on_write()
+
+    engine = create_database_engine()
+    worker = ReportWorker(engine, settings.report_worker_concurrency)
+
+    def handle_signal(signum: int, frame: FrameType | None) -> None:
+        logger.info("Received %s, finishing running jobs", signal.Signals(signum).name)
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    worker.start()
+    worker.join()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+import argparse
+import asyncio
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel
+
+from app.consensus.category_selection import CategorySelectionGraphState, category_selection_graph
+from app.consensus.dimension_extraction import DimensionExtractionGraphState, dimension_extraction_graph
+from app.consensus.summary import SummaryGraphState, enable_copy_on_write, summary_graph
+from app.fake_llm import FakeChatModel
+from app.instrumentation import LLMInstrumentationHandler
+from app.models import Discussion, Message
+from app.rate_limit import RateLimiter
+from app.settings import settings
+from app.types import ThemeSimilarity
+
+
+DEFAULT_SIZES = (100, 10_000, 100_000)
+
+SYNTHETIC_OPENINGS = (
+    "I think",
+    "Honestly,",
+    "From my experience,",
+    "The data shows that",
+    "It might be that",
+    "Definitely",
+    "I'm not sure, but",
+)
+
+SYNTHETIC_CLAIMS = (
+    "the new deployment pipeline would save us hours every week",
+    "we need better onboarding docs before we grow the team",
+    "SSO is blocking half of our external contributors",
+    "the migration is too risky for this quarter",
+    "our test coverage is too low to release faster",
+    "we spend too much time in meetings to get this done",
+    "the budget does not cover another platform license",
+    "hiring should come before any new initiative",
+)
+
+SYNTHETIC_REASONS = (
+    "because the last release slipped by two weeks.",
+    "since three customers asked for it.",
+    "as the benchmark from last sprint showed.",
+    "which we saw in the retro.",
+    "and nobody owns it right now.",
+    "",
+)
+
+
+class NodeTimingHandler(BaseCallbackHandler):
+    """Sums the wall time spent in each graph node; graphs are told apart by the `graph` run metadata."""
+
+    # Records the timestamps when the callbacks fire, instead of when an executor gets to them
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._started: dict[uuid.UUID, tuple[float, str]] = {}
+        self.seconds: defaultdict[str, float] = defaultdict(float)
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any],
+        inputs: dict[str, Any],
+        *,
+        run_id: uuid.UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        # Runnables inside a node inherit its `langgraph_node`, only the node itself is named after it
+        if "langgraph_node" in metadata and kwargs.get("name") == metadata["langgraph_node"]:
+            with self._lock:
+                self._started[run_id] = (time.perf_counter(), f"{metadata.get('graph')}.{metadata['langgraph_node']}")
+
+    def on_chain_end(self, outputs: Any, *, run_id: uuid.UUID, **kwargs: Any) -> None:
+        self.record(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: uuid.UUID, **kwargs: Any) -> None:
+        self.record(run_id)
+
+    def record(self, run_id: uuid.UUID) -> None:
+        with self._lock:
+            if (started := self._started.pop(run_id, None)) is not None:
+                started_at, node = started
+                self.seconds[node] += time.perf_counter() - started_at
+
+
+class NodeMemoryHandler(BaseCallbackHandler):
+    """
+    Records the peak memory each graph node allocates on top of what was allocated when it started, with `tracemalloc`.
+    Resets the `tracemalloc` peak at every node, so the nodes must run one at a time (`max_concurrency=1`);
+    `peak_memory_bytes` keeps the overall peak.
+    """
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._started: dict[uuid.UUID, tuple[int, str]] = {}
+        self.peak_memory_bytes = 0
+        self.node_peak_memory_bytes: dict[str, int] = {}
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any],
+        inputs: dict[str, Any],
+        *,
+        run_id: uuid.UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        if "langgraph_node" in metadata and kwargs.get("name") == metadata["langgraph_node"]:
+            started_memory_bytes, peak_memory_bytes = tracemalloc.get_traced_memory()
+            self.peak_memory_bytes = max(self.peak_memory_bytes, peak_memory_bytes)
+            tracemalloc.reset_peak()
+            self._started[run_id] = (started_memory_bytes, f"{metadata.get('graph')}.{metadata['langgraph_node']}")
+
+    def on_chain_end(self, outputs: Any, *, run_id: uuid.UUID, **kwargs: Any) -> None:
+        self.record(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: uuid.UUID, **kwargs: Any) -> None:
+        self.record(run_id)
+
+    def record(self, run_id: uuid.UUID) -> None:
+        if (started := self._started.pop(run_id, None)) is not None:
+            started_memory_bytes, node = started
+            _, peak_memory_bytes = tracemalloc.get_traced_memory()
+            self.peak_memory_bytes = max(self.peak_memory_bytes, peak_memory_bytes)
+            self.node_peak_memory_bytes[node] = max(
+                self.node_peak_memory_bytes.get(node, 0), peak_memory_bytes - started_memory_bytes
+            )
+
+
+class BenchmarkResult(BaseModel):
+    messages: int
+    wall_seconds: float
+    # Not measured with `trace_memory=False`
+    peak_memory_bytes: int | None
+    llm_calls: int
+    failed_extractions: int
+    # Per `<graph>.<node>`, in the order the nodes finished
+    node_seconds: dict[str, float]
+    # Per `<summary>.<node>`, the peak memory allocated by the node; empty with `trace_memory=False`
+    node_peak_memory_bytes: dict[str, int]
+
+
+def create_discussion(size: int, seed: int = 0) -> Discussion:
+    """A discussion without template, so that the category is selected by the LLM, with `size` synthetic notes."""
+    rng = random.Random(seed)
+    discussion_id = uuid.uuid4()
+    created_at = datetime(2025, 1, 1)
+
+    return Discussion(
+        id=discussion_id,
+        owner_id=uuid.uuid4(),
+        name="Should we move our deployments to the new platform?",
+        description="The platform team proposes to migrate all services next quarter. Share your opinion.",
+        messages=[
+            Message(
+                discussion_id=discussion_id,
+                owner_id=uuid.uuid4(),
+                # The index keeps notes unique, like in real discussions, so every note gets its own dimensions
+                message=" ".join(
+                    (rng.choice(SYNTHETIC_OPENINGS), rng.choice(SYNTHETIC_CLAIMS), rng.choice(SYNTHETIC_REASONS))
+                ).strip()
+                + f" (#{i})",
+                created_at=created_at + timedelta(seconds=i),
+            )
+            for i in range(size)
+        ],
+    )
+
+
+def create_config(
+    graph: str, callbacks: list[BaseCallbackHandler], max_concurrency: int | None = None, **configurable: Any
+) -> RunnableConfig:
+    return RunnableConfig(
+        configurable=configurable, callbacks=callbacks, metadata={"graph": graph}, max_concurrency=max_concurrency
+    )
+
+
+def run_pipeline(
+    discussion: Discussion,
+    llm: BaseChatModel,
+    trace_memory: bool = True,
+    theme_similarity: ThemeSimilarity = settings.theme_similarity,
+) -> BenchmarkResult:
+    """
+    Runs category selection, dimension extraction and summary like `generate_consensus_report`,
+    without the database, the LLM cache and checkpoints.
+    Peak memory is measured with `tracemalloc`, which slows the run down several times over;
+    only compare wall times of runs with the same `trace_memory`.
+    The peak memory of the summary nodes is measured too, for which they run one at a time.
+    """
+    node_timing_handler = NodeTimingHandler()
+    instrumentation_handler = LLMInstrumentationHandler()
+    node_memory_handler = NodeMemoryHandler()
+    callbacks: list[BaseCallbackHandler] = [node_timing_handler, instrumentation_handler]
+
+    if trace_memory:
+        tracemalloc.start()
+    started_at = time.perf_counter()
+
+    category_selection_graph_state = category_selection_graph.invoke(
+        CategorySelectionGraphState(discussion=discussion),
+        create_config("category_selection", callbacks, llm=llm),
+    )
+    category = category_selection_graph_state["category"]
+
+    dimension_extraction_graph_state = asyncio.run(
+        dimension_extraction_graph.ainvoke(
+            DimensionExtractionGraphState(discussion=discussion, category=category, messages=discussion.messages),
+            create_config("dimension_extraction", callbacks, llm=llm, rate_limiter=RateLimiter()),
+        )
+    )
+    extracted = [
+        (message.id, dimensions)
+        for message, dimensions in zip(discussion.messages, dimension_extraction_graph_state["dimensions"], strict=True)
+        if dimensions is not None
+    ]
+
+    summary_graph.invoke(
+        SummaryGraphState(
+            discussion=discussion,
+            category=category,
+            message_ids=[message_id for message_id, _ in extracted],
+            dimensions=[dimensions for _, dimensions in extracted],
+        ),
+        create_config(
+            "summary",
+            [*callbacks, node_memory_handler] if trace_memory else callbacks,
+            max_concurrency=1 if trace_memory else None,
+            llm=llm,
+            theme_similarity=theme_similarity,
+        ),
+    )
+
+    wall_seconds = time.perf_counter() - started_at
+    peak_memory_bytes = None
+    if trace_memory:
+        _, peak_memory_bytes = tracemalloc.get_traced_memory()
+        peak_memory_bytes = max(peak_memory_bytes, node_memory_handler.peak_memory_bytes)
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        messages=len(discussion.messages),
+        wall_seconds=wall_seconds,
+        peak_memory_bytes=peak_memory_bytes,
+        llm_calls=len(instrumentation_handler.records),
+        failed_extractions=len(discussion.messages) - len(extracted),
+        node_seconds=dict(node_timing_handler.seconds),
+        node_peak_memory_bytes=node_memory_handler.node_peak_memory_bytes,
+    )
+
+
+def print_result(result: BenchmarkResult) -> None:
+    peak_memory = "-" if result.peak_memory_bytes is None else f"{result.peak_memory_bytes / 2**20:.1f} MiB"
+    print(
+        f"{result.messages} messages: {result.wall_seconds:.2f}s wall time, {peak_memory} peak memory, "
+        f"{result.llm_calls} LLM calls, {result.failed_extractions} failed extractions"
+    )
+    for node, seconds in sorted(result.node_seconds.items(), key=lambda item: item[1], reverse=True):
+        memory_bytes = result.node_peak_memory_bytes.get(node)
+        peak_memory = "" if memory_bytes is None else f" {memory_bytes / 2**20:>8.1f} MiB"
+        print(f"  {node:<60} {seconds:>10.3f}s{peak_memory}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks the consensus report pipeline with a fake LLM.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="numbers of messages")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per fake LLM call")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic discussions and the fake LLM")
+    parser.add_argument("--batch-size", type=int, default=settings.dimension_extraction_batch_size)
+    parser.add_argument("--concurrency", type=int, default=settings.dimension_extraction_concurrency)
+    parser.add_argument(
+        "--theme-similarity",
+        choices=[similarity.value for similarity in ThemeSimilarity],
+        default=settings.theme_similarity.value,
+        help="similarity of the theme clustering",
+    )
+    parser.add_argument(
+        "--no-trace-memory",
+        dest="trace_memory",
+        action="store_false",
+        help="skips measuring the peak memory, which slows the pipeline down",
+    )
+    parser.add_argument("--output", type=Path, help="writes the results as JSON, e.g. to compare two revisions")
+    args = parser.parse_args()
+
+    settings.dimension_extraction_batch_size = args.batch_size
+    settings.dimension_extraction_concurrency = args.concurrency
+    # Like the report worker
+    enable_copy_on_write()
+    llm = FakeChatModel(latency=args.latency, seed=args.seed)
+
+    results: list[BenchmarkResult] = []
+    for size in args.sizes:
+        result = run_pipeline(
+            create_discussion(size, args.seed), llm, args.trace_memory, ThemeSimilarity(args.theme_similarity)
+        )
+        print_result(result)
+        results.append(result)
+
+    if args.output is not None:
+        args.output.write_text(
+            "[\n" + ",\n".join(result.model_dump_json(indent=2) for result in results) + "\n]\n", encoding="utf-8"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import random
+import uuid
+
+from typing import cast
+
+import pytest
+
+from app.consensus.dimension_extraction import CATEGORY_DIMENSIONS_SCHEMAS
+from app.consensus.summary import SummaryGraphState, summary_graph
+from app.fake_llm import FakeChatModel, fake_object
+from app.models import Discussion
+from app.types import Category, Dimensions
+
+
+def invoke_summary_graph(category: Category, relevancies: list[float]) -> dict:
+    schema = CATEGORY_DIMENSIONS_SCHEMAS[category]
+    dimensions = [
+        cast(Dimensions, fake_object(schema, random.Random(i), text=f"note {i}", relevancy=relevancy, risk_flag=False))
+        for i, relevancy in enumerate(relevancies)
+    ]
+
+    discussion = Discussion(id=uuid.uuid4(), owner_id=uuid.uuid4(), name="Topic", description="Description")
+    state = SummaryGraphState(
+        discussion=discussion,
+        category=category,
+        message_ids=[uuid.uuid4() for _ in dimensions],
+        dimensions=dimensions,
+    )
+    return summary_graph.invoke(state, {"configurable": {"llm": FakeChatModel()}})
+
+
+@pytest.mark.parametrize("category", list(Category))
+@pytest.mark.parametrize("relevancies", [[], [0.1, 0.2, 0.3]], ids=["no messages", "all filtered"])
+def test_summary_graph_without_rows(category: Category, relevancies: list[float]) -> None:
+    state = invoke_summary_graph(category, relevancies)
+
+    assert state["theme_board"].empty
+    assert state["summary"] is not None
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from app.consensus.summary_helpers import cluster_similarity, cluster_themes
+
+
+def brute_force_cluster_themes(themes: list[str], sim_threshold: float) -> dict[str, int]:
+    """The greedy loop `cluster_themes` replaces, scoring every cluster label."""
+    labels: list[str] = []
+    theme_to_cluster: dict[str, int] = {}
+    for theme in themes:
+        best_sim, best_id = 0.0, -1
+        for cluster_id, label in enumerate(labels):
+            sim = cluster_similarity(theme, label)
+            if sim > best_sim:
+                best_sim, best_id = sim, cluster_id
+
+        if best_id >= 0 and best_sim >= sim_threshold:
+            theme_to_cluster[theme] = best_id
+        else:
+            theme_to_cluster[theme] = len(labels)
+            labels.append(theme)
+    return theme_to_cluster
+
+
+def random_themes(rng: random.Random, n: int) -> list[str]:
+    words = ["cost", "costs", "price", "safety", "Safe", "bike", "lanes", "lane", "ab", "ba", "parking", "noise"]
+    themes = [" ".join(rng.choices(words, k=rng.randint(1, 3))) for _ in range(n)]
+    # Short strings of few letters share characters without sharing tokens or bigrams
+    themes += ["".join(rng.choices("abcde ", k=rng.randint(1, 6))) for _ in range(n)]
+    rng.shuffle(themes)
+    return list(dict.fromkeys(themes))
+
+
+@pytest.mark.parametrize("sim_threshold", [0.2, 0.35, 0.6])
+@pytest.mark.parametrize("seed", range(5))
+def test_cluster_themes_matches_brute_force(seed: int, sim_threshold: float) -> None:
+    themes = random_themes(random.Random(seed), 150)
+    assert cluster_themes(themes, sim_threshold) == brute_force_cluster_themes(themes, sim_threshold)
+
+
+def test_cluster_themes_joins_on_shared_characters_only() -> None:
+    # No shared token or bigram, but `SequenceMatcher.ratio` is 0.5
+    assert cluster_themes(["ab", "ba"], 0.35) == {"ab": 0, "ba": 0}
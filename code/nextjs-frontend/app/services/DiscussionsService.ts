@@ -1,15 +1,27 @@
 const baseUrl = "https://fastapi.nutline.cloud/";
 
-export async function getDiscussionsService() {
+const discussionsPageSize = 30;
+
+// One page of the discussion list; pass its nextCursor to get the following page
+export async function getDiscussionsService(
+  cursor?: string | null
+): Promise<PaginatedDiscussions> {
   try {
-    const url = baseUrl + "discussions/";
+    const params = new URLSearchParams({ limit: String(discussionsPageSize) });
+    if (cursor) {
+      params.set("cursor", cursor);
+    }
+    const url = baseUrl + `discussions/?${params}`;
     const res = await fetch(url);
 
     if (!res.ok) {
       throw new Error(`HTTP error! status: ${res.status}`);
     }
 
-    return (await res.json()) as Discussion[];
+    return {
+      discussions: (await res.json()) as Discussion[],
+      nextCursor: res.headers.get("X-Next-Cursor"),
+    };
   } catch (error) {
     console.error("Failed to fetch discussions:", error);
     //return [];
@@ -147,6 +159,12 @@ export type Discussion = {
   messages: any[];
 };
 
+export type PaginatedDiscussions = {
+  discussions: Discussion[];
+  // Cursor of the next page, null on the last one
+  nextCursor: string | null;
+};
+
 export type Message = {
   message: string;
   discussion_id: string;
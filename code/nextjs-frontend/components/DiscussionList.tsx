@@ -0,0 +1,127 @@
+"use client";
+
+import * as React from "react";
+import DiscussionCard from "@/components/DiscussionCard";
+import { Button } from "@/components/ui/button";
+import {
+  getDiscussionsService,
+  type Discussion,
+} from "@/app/services/DiscussionsService";
+
+interface DiscussionListProps {
+  readonly initialDiscussions: Discussion[];
+  readonly initialNextCursor: string | null;
+}
+
+function formatRelativeTime(dateIso?: string) {
+  if (!dateIso) {
+    return "Just now";
+  }
+
+  const date = new Date(dateIso);
+  if (Number.isNaN(date.getTime())) {
+    return "Just now";
+  }
+
+  const now = Date.now();
+  const diffMs = date.getTime() - now;
+  const diffSec = Math.round(diffMs / 1000);
+  const absSec = Math.abs(diffSec);
+
+  const units: Array<[Intl.RelativeTimeFormatUnit, number]> = [
+    ["year", 60 * 60 * 24 * 365],
+    ["month", 60 * 60 * 24 * 30],
+    ["week", 60 * 60 * 24 * 7],
+    ["day", 60 * 60 * 24],
+    ["hour", 60 * 60],
+    ["minute", 60],
+    ["second", 1],
+  ];
+
+  const formatter = new Intl.RelativeTimeFormat(undefined, { numeric: "auto" });
+  for (const [unit, secondsInUnit] of units) {
+    if (absSec >= secondsInUnit || unit === "second") {
+      const value = Math.round(diffSec / secondsInUnit);
+      return formatter.format(value, unit);
+    }
+  }
+
+  return "Just now";
+}
+
+function formatTagSummary(tags: string[]) {
+  if (!tags || tags.length === 0) {
+    return "No tags";
+  }
+
+  if (tags.length === 1) {
+    return `#${tags[0]}`;
+  }
+
+  const [first, second, ...rest] = tags;
+  if (rest.length === 0) {
+    return `#${first}, #${second}`;
+  }
+
+  return `#${first}, #${second} +${rest.length} more`;
+}
+
+// Shows the first page rendered by the server and fetches further pages on demand
+export function DiscussionList({
+  initialDiscussions,
+  initialNextCursor,
+}: DiscussionListProps) {
+  const [discussions, setDiscussions] = React.useState(initialDiscussions);
+  const [nextCursor, setNextCursor] = React.useState(initialNextCursor);
+  const [isLoading, setIsLoading] = React.useState(false);
+  const [loadError, setLoadError] = React.useState<string | null>(null);
+
+  const loadMore = async () => {
+    if (!nextCursor) {
+      return;
+    }
+
+    setIsLoading(true);
+    setLoadError(null);
+    try {
+      const page = await getDiscussionsService(nextCursor);
+      setDiscussions((current) => [...current, ...page.discussions]);
+      setNextCursor(page.nextCursor);
+    } catch {
+      setLoadError("We couldn't load more discussions. Please try again.");
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
+  return (
+    <>
+      <div className="mt-8 grid grid-cols-1 gap-4 md:grid-cols-2 lg:grid-cols-3">
+        {discussions.map((discussion) => (
+          <DiscussionCard
+            key={discussion.id}
+            title={discussion.name}
+            desc={discussion.description}
+            created={formatRelativeTime(discussion.created_at)}
+            responses={formatTagSummary(discussion.tags ?? [])}
+            id={discussion.id}
+          />
+        ))}
+      </div>
+
+      {loadError && (
+        <div className="mt-4 rounded-md border border-red-200 bg-red-50 p-4 text-sm text-red-600">
+          {loadError}
+        </div>
+      )}
+
+      {nextCursor && (
+        <div className="mt-8 flex justify-center">
+          <Button variant="outline" onClick={loadMore} disabled={isLoading}>
+            {isLoading ? "Loading..." : "Load more"}
+          </Button>
+        </div>
+      )}
+    </>
+  );
+}